@@ -0,0 +1,150 @@
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Detection, DetectionRollup
+
+logger = logging.getLogger()
+
+GRANULARITIES = ("minute", "hour")
+
+
+# Awal bucket waktu untuk granularity tertentu
+def bucket_start(timestamp, granularity):
+    timestamp = timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        timestamp = timestamp.replace(minute=0)
+    return timestamp
+
+
+# Kategori rekap untuk satu nilai detected_objects. Masuk/keluar hanya
+# dihitung dari baris kejadian "Masuk"/"Keluar" (satu baris per kendaraan),
+# bukan dari baris kelas yang penyimpanannya dibatasi save_interval, sehingga
+# rekap live dan hasil rebuild_rollups selalu sama.
+def categories(detected_objects):
+    if detected_objects == "Masuk":
+        return ["entries"]
+    if detected_objects == "Keluar":
+        return ["exits"]
+    names = [name.strip() for name in detected_objects.split(",") if name.strip()]
+    return [f"class:{name}" for name in names]
+
+
+# Delta rekap {(granularity, bucket, kategori): jumlah} dari pasangan
+# (timestamp, detected_objects)
+def rollup_deltas(events):
+    deltas = Counter()
+    for timestamp, detected_objects in events:
+        for category in categories(detected_objects):
+            for granularity in GRANULARITIES:
+                bucket = bucket_start(timestamp, granularity)
+                deltas[(granularity, bucket, category)] += 1
+    return deltas
+
+
+# Tambahkan delta ke tabel rekap dengan INSERT ... ON CONFLICT DO UPDATE.
+# `conn` boleh Connection atau db.session.
+def upsert_rollup(conn, dialect, deltas, chunk_size=1000):
+    table = DetectionRollup.__table__
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    values = [
+        {
+            "granularity": granularity,
+            "bucket_start": bucket,
+            "category": category,
+            "total": total,
+        }
+        for (granularity, bucket, category), total in deltas.items()
+    ]
+    for offset in range(0, len(values), chunk_size):
+        statement = insert(table).values(values[offset : offset + chunk_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=["granularity", "bucket_start", "category"],
+            set_={"total": table.c.total + statement.excluded.total},
+        )
+        conn.execute(statement)
+
+
+# Hitung ulang seluruh rekap dari tabel detection (mis. setelah data lama
+# diimpor). Baris dibaca bertahap agar memori tetap kecil.
+def rebuild_rollups(engine, batch_size=5000):
+    detection = Detection.__table__
+    with engine.begin() as conn:
+        conn.execute(delete(DetectionRollup.__table__))
+        result = conn.execution_options(yield_per=batch_size).execute(
+            select(detection.c.timestamp, detection.c.detected_objects)
+        )
+        deltas = rollup_deltas(result)
+        upsert_rollup(conn, engine.dialect.name, deltas)
+    return len(deltas)
+
+
+# Jumlah kendaraan yang sedang parkir: total masuk - total keluar
+def current_occupancy():
+    totals = dict(
+        db.session.query(DetectionRollup.category, func.sum(DetectionRollup.total))
+        .filter(
+            DetectionRollup.granularity == "hour",
+            DetectionRollup.category.in_(["entries", "exits"]),
+        )
+        .group_by(DetectionRollup.category)
+        .all()
+    )
+    return max(0, int(totals.get("entries") or 0) - int(totals.get("exits") or 0))
+
+
+# Rekap per bucket: {bucket ISO: {kategori: jumlah}}
+def throughput(granularity="hour", start=None, end=None):
+    query = DetectionRollup.query.filter(DetectionRollup.granularity == granularity)
+    if start is not None:
+        query = query.filter(DetectionRollup.bucket_start >= start)
+    if end is not None:
+        query = query.filter(DetectionRollup.bucket_start < end)
+
+    buckets = {}
+    for row in query.order_by(DetectionRollup.bucket_start).all():
+        buckets.setdefault(row.bucket_start.isoformat(), {})[row.category] = row.total
+    return buckets
+
+
+# Agregasi inkremental: dipasang sebagai listener DetectionWriter sehingga
+# setiap batch langsung menambah rekap per menit/jam dalam transaksi yang sama
+# dengan insert deteksinya, lalu hitungan okupansi di memori diperbarui setelah
+# commit. Dipanggil di thread writer (dalam app context).
+class OccupancyAggregator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.occupancy = None  # Dimuat dari rekap saat batch pertama
+        self.counts = Counter()  # Total per kategori sejak proses berjalan
+        self._uncommitted = Counter()
+
+    # Tambahkan rekap batch ke transaksi yang sedang berjalan (tanpa commit)
+    def __call__(self, rows):
+        deltas = rollup_deltas(
+            (row.get("timestamp") or datetime.utcnow(), row["detected_objects"])
+            for row in rows
+        )
+        if self.occupancy is None:
+            self.occupancy = current_occupancy()
+        upsert_rollup(db.session, db.engine.dialect.name, deltas)
+
+        self._uncommitted = Counter()
+        for (granularity, _, category), total in deltas.items():
+            if granularity == "hour":
+                self._uncommitted[category] += total
+
+    # Dipanggil writer setelah batch dan rekapnya berhasil di-commit
+    def after_commit(self, rows):
+        hourly, self._uncommitted = self._uncommitted, Counter()
+        with self._lock:
+            self.counts.update(hourly)
+            occupancy = self.occupancy + hourly["entries"] - hourly["exits"]
+            self.occupancy = max(0, occupancy)
+
+    def stats(self):
+        with self._lock:
+            return {"occupancy": self.occupancy, "counts": dict(self.counts)}
@@ -1,20 +1,22 @@
 import os
-from ultralytics import YOLO
+import time
 import cv2
 from flask import Flask, jsonify
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
-from flask_marshmallow import Marshmallow
 from dotenv import load_dotenv
 from datetime import datetime
+from models import db, ma, Detection
+from capture import MAX_FRAME_AGE
+from model_registry import model_registry, camera_pool, readiness
+from detections_api import detections_api
+from metrics import registry
+from metrics_api import metrics_api
+from stats_api import stats_api
+from postprocess import Detections
 
 # Muat variabel dari .env
 load_dotenv()
 
-# Inisialisasi SQLAlchemy dan Marshmallow
-db = SQLAlchemy()
-ma = Marshmallow()
-
 def create_app():
     app = Flask(__name__)
     CORS(app, supports_credentials=True)
@@ -27,37 +29,53 @@ def create_app():
     db.init_app(app)
     ma.init_app(app)
 
-    # Definisi model
-    class Detection(db.Model):
-        id = db.Column(db.Integer, primary_key=True)
-        timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-        detected_objects = db.Column(db.Text, nullable=False)
-        image_path = db.Column(db.String(255), nullable=False)
-
     # Membuat tabel di database jika belum ada
     with app.app_context():
         db.create_all()
 
+    # API riwayat deteksi (GET /detections)
+    app.register_blueprint(detections_api)
+
+    # Statistik okupansi dan throughput (GET /stats/...)
+    app.register_blueprint(stats_api)
+
+    # Metrik Prometheus (GET /metrics, aktif dengan METRICS_ENABLED=1)
+    app.register_blueprint(metrics_api)
+
+    # Muat model dan buka kamera sekali saat aplikasi dimulai
+    model_path = "best.pt"  # Ganti dengan path model Anda
+    camera_source = 0  # Ganti dengan sumber video yang sesuai
+    model = model_registry.get(model_path)
+    camera_pool.get(camera_source)
+
+    @app.route('/ready', methods=['GET'])
+    def ready():
+        status = readiness()
+        return jsonify(status), 200 if status["ready"] else 503
+
     @app.route('/detect', methods=['GET'])
     def detect_objects():
-        model_path = "best.pt"  # Ganti dengan path model Anda
-        model = YOLO(model_path)
-        cap = cv2.VideoCapture(0)  # Ganti dengan sumber video yang sesuai
-
-        if not cap.isOpened():
-            return jsonify({"error": "Gagal membuka kamera!"}), 500
+        camera = camera_pool.get(camera_source)
 
-        ret, frame = cap.read()
-        if not ret:
-            cap.release()
+        # Ambil frame terbaru dari kamera bersama
+        captured = camera.read(after_seq=0, timeout=5)
+        if captured is None:
             return jsonify({"error": "Gagal membaca frame dari kamera!"}), 500
+        # Frame lama tersisa saat kamera terputus dan sedang menyambung ulang
+        if time.monotonic() - captured.captured_at > MAX_FRAME_AGE:
+            return jsonify({"error": "Kamera sedang terputus!"}), 503
+        frame = captured.frame
 
         # Jalankan deteksi menggunakan model YOLO
-        results = model(frame)
-        detected_objects = ', '.join([res.name for res in results[0].boxes])
+        with registry.stage("inference"):
+            results = model(frame)
+        detected_objects = ', '.join(
+            Detections.from_result(results[0], model.names).labels()
+        )
 
         # Visualisasi hasil deteksi
-        annotated_frame = results[0].plot()
+        with registry.stage("plot"):
+            annotated_frame = results[0].plot()
 
         # Simpan gambar anotasi
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -74,8 +92,6 @@ def create_app():
         db.session.add(detection)
         db.session.commit()
 
-        cap.release()
-
         return jsonify({
             "timestamp": timestamp,
             "detected_objects": detected_objects,
@@ -88,4 +104,6 @@ def create_app():
 # Entry point aplikasi
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True)
+    # Tanpa reloader: proses anak reloader akan membuka kamera dan memuat
+    # model sekali lagi
+    app.run(debug=True, use_reloader=False)
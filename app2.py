@@ -1,15 +1,24 @@
 import os
-from ultralytics import YOLO
-import cv2
-from flask import Flask, jsonify, Response
+import threading
+from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
-from flask_marshmallow import Marshmallow
-from datetime import datetime
-
-# Inisialisasi SQLAlchemy dan Marshmallow
-db = SQLAlchemy()
-ma = Marshmallow()
+from models import db, ma, Detection
+from model_registry import model_registry, camera_pool, readiness
+from detections_api import detections_api
+from stats_api import stats_api
+from metrics import registry
+from metrics_api import metrics_api
+from aggregates import OccupancyAggregator
+from detection_writer import DetectionWriter
+from frame_store import LocalFrameStore
+from inference_engine import BatchInferenceEngine
+from mjpeg_broadcast import MjpegBroadcaster, start_async_server
+from postprocess import VEHICLE_CLASSES
+from gate_service import GateHandler, normalize_config
+from roi import get_roi
+
+# Port server MJPEG asyncio tambahan (kosong = tidak dijalankan)
+MJPEG_ASYNC_PORT = int(os.getenv("MJPEG_ASYNC_PORT", "0"))
 
 
 def create_app():
@@ -26,114 +35,126 @@ def create_app():
     db.init_app(app)
     ma.init_app(app)
 
-    # Definisi model
-    class Detection(db.Model):
-        id = db.Column(db.Integer, primary_key=True)
-        timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-        detected_objects = db.Column(db.Text, nullable=False)
-        image_path = db.Column(db.String(255), nullable=False)
-        data = db.Column(
-            db.LargeBinary, nullable=False
-        )  # Menyimpan gambar sebagai BLOB
-
     # Membuat tabel di database jika belum ada
     with app.app_context():
         db.create_all()
 
-    @app.route("/", methods=["GET"])
-    def detect_objects_stream():
-        model_path = "best.pt"  # Ganti dengan path model Anda
-        model = YOLO(model_path)
-
-        # Ganti alamat IP dan port sesuai dengan kamera ESP32-S3 Anda
-        camera_ip = "http://192.168.1.7/stream"  # Ganti dengan URL stream video kamera ESP32-S3 Anda
+    # API riwayat deteksi (GET /detections)
+    app.register_blueprint(detections_api)
+
+    # Statistik okupansi dan throughput (GET /stats/...)
+    app.register_blueprint(stats_api)
+
+    # Metrik Prometheus (GET /metrics, aktif dengan METRICS_ENABLED=1)
+    app.register_blueprint(metrics_api)
+
+    # Deteksi disimpan di background secara bertahap (bulk insert)
+    # Setiap batch yang tersimpan juga menambah tabel rekap
+    writer = DetectionWriter(app, db, Detection)
+    writer.add_listener(OccupancyAggregator()).start()
+    frame_store = LocalFrameStore("annotations")  # Gambar disimpan berdasarkan hash
+    registry.register("writer", writer)
+    registry.register("frame_store", frame_store)
+
+    # Muat model dan buka kamera sekali saat aplikasi dimulai
+    model_path = "best.pt"  # Ganti dengan path model Anda
+
+    # Ganti alamat IP dan port sesuai dengan kamera ESP32-S3 Anda
+    camera_ip = "http://192.168.1.7/stream"  # Ganti dengan URL stream video kamera ESP32-S3 Anda
+
+    model = model_registry.get(model_path)
+    camera_pool.get(camera_ip)
+
+    # Area jalur gerbang dari roi_config.json (None = frame penuh)
+    roi = get_roi(camera_ip)
+
+    @app.route("/ready", methods=["GET"])
+    def ready():
+        status = readiness()
+        return jsonify(status), 200 if status["ready"] else 503
+
+    # Satu produsen untuk kamera ini: deteksi berjalan sekali per frame dan
+    # frame dibagikan ke semua penonton lewat broadcaster (encode sekali per
+    # resolusi yang ditonton, buffer per penonton dibatasi)
+    broadcaster = MjpegBroadcaster(quality=80, buffer_size=2)
+    registry.register("mjpeg", broadcaster)
+    producer_lock = threading.Lock()
+    producer = None
+
+    # Deteksi setiap 5 frame (jika ada gerakan di area jalur); setiap
+    # kendaraan baru disimpan sekali dengan gambar beranotasi
+    gate = normalize_config(
+        {
+            "gates": [
+                {
+                    "name": "stream",
+                    "camera": camera_ip,
+                    "classes": {name: None for name in VEHICLE_CLASSES},
+                    "detect_every": 5,
+                    "save_annotated": True,
+                }
+            ],
+            "mode": "inline",
+        }
+    )["gates"][0]
+
+    def build_producer(camera):
+        # Frame asli setiap frame dibagikan ke semua penonton
+        handler = GateHandler(
+            gate,
+            model.names,
+            writer,
+            frame_store,
+            camera,
+            roi=roi,
+            sinks=[lambda frame, result: broadcaster.publish(frame)],
+        )
+        registry.register("gate", handler, gate="stream")
 
-        cap = cv2.VideoCapture(camera_ip)
+        # Deteksi hanya pada area jalur (resolusi asli); box dipetakan kembali
+        # ke frame penuh oleh engine
+        return BatchInferenceEngine(model).add_source(
+            "stream", camera, handler, gate=handler.should_infer, roi=roi
+        )
 
-        if not cap.isOpened():
+    # Jalankan (atau jalankan ulang setelah kamera putus) produsen stream
+    def ensure_producer():
+        nonlocal producer
+        with producer_lock:
+            if producer is not None and producer.is_running():
+                return producer
+            camera = camera_pool.get(camera_ip)
+            if camera is None:
+                return None
+            producer = build_producer(camera).start()
+            registry.register("engine", producer)
+            return producer
+
+    ensure_producer()
+
+    # Server MJPEG asyncio opsional (MJPEG_ASYNC_PORT) untuk banyak penonton
+    if MJPEG_ASYNC_PORT:
+        start_async_server(broadcaster, port=MJPEG_ASYNC_PORT)
+
+    # GET /?width=&fps=  Resolusi dan laju frame bisa diatur per penonton
+    @app.route("/", methods=["GET"])
+    def detect_objects_stream():
+        if ensure_producer() is None:
             return jsonify(
                 {"error": "Gagal membuka kamera. Periksa koneksi dan konfigurasi!"}
             ), 500
 
-        frame_counter = 0
-        interval = 5  # Deteksi setiap 5 frame
-        detections_to_save = []
-
-        def generate_frames():
-            nonlocal frame_counter, detections_to_save
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break  # Berhenti jika frame tidak bisa dibaca
-
-                if frame_counter % interval == 0:
-                    # Ubah resolusi menjadi 160x120 untuk deteksi lebih cepat
-                    frame_resized = cv2.resize(frame, (160, 120))
-
-                    # Jalankan deteksi menggunakan model YOLO pada frame dengan resolusi rendah
-                    results = model(frame_resized)
-                    detected_objects = []
-
-                    # Iterasi hasil deteksi
-                    for box in results[0].boxes:
-                        class_id = int(box.cls)  # Ambil indeks kelas
-                        class_name = model.names[
-                            class_id
-                        ]  # Ambil nama kelas berdasarkan indeks
-                        if class_name in [
-                            "mobil",
-                            "motor",
-                        ]:  # Filter hanya mobil atau motor
-                            detected_objects.append(class_name)
-
-                    if detected_objects:  # Jika ada mobil/motor terdeteksi
-                        # Visualisasi hasil deteksi
-                        annotated_frame = results[0].plot()
-
-                        # Simpan gambar anotasi
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        image_path = f"annotations/detection_{timestamp}.jpg"
-                        os.makedirs("annotations", exist_ok=True)
-                        cv2.imwrite(image_path, annotated_frame)
-
-                        # Konversi gambar anotasi ke format binary
-                        _, buffer = cv2.imencode(".jpg", annotated_frame)
-                        image_binary = buffer.tobytes()
-
-                        # Simpan ke database menggunakan SQLAlchemy
-                        detection = Detection(
-                            timestamp=datetime.utcnow(),
-                            detected_objects=", ".join(detected_objects),
-                            image_path=image_path,
-                            data=image_binary,  # Simpan gambar sebagai BLOB
-                        )
-                        detections_to_save.append(detection)
-
-                # Encode frame asli (sebelum resize) ke format JPEG untuk streaming
-                _, buffer = cv2.imencode(".jpg", frame)
-                frame_bytes = buffer.tobytes()
-
-                # Kirim frame sebagai streaming video
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
-                )
-
-                frame_counter += 1
-
-        # Simpan deteksi ke database setelah beberapa frame untuk mengurangi overhead
-        if detections_to_save:
-            try:
-                with app.app_context():
-                    db.session.add_all(detections_to_save)
-                    db.session.commit()
-            except Exception as e:
-                db.session.rollback()
-                print(f"Error saving to database: {e}")
+        width = request.args.get("width", type=int)
+        fps = request.args.get("fps", type=float)
+        subscriber = broadcaster.subscribe(
+            width=max(80, width) if width else None,
+            fps=min(max(0.1, fps), 30.0) if fps else None,
+        )
 
         return (
             Response(
-                generate_frames(), mimetype="multipart/x-mixed-replace; boundary=frame"
+                broadcaster.frames(subscriber),
+                mimetype="multipart/x-mixed-replace; boundary=frame",
             ),
             200,
         )
@@ -144,4 +165,6 @@ def create_app():
 # Entry point aplikasi
 if __name__ == "__main__":
     app = create_app()
-    app.run(debug=True)
+    # Tanpa reloader: proses anak reloader akan membuka kamera dan memuat
+    # model sekali lagi
+    app.run(debug=True, use_reloader=False)
@@ -0,0 +1,114 @@
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+
+from bench_encode import load_frames
+from model_registry import SharedModel
+from model_backends import BACKENDS
+from tracker import iou_matrix
+
+
+# Deteksi per frame sebagai (xyxy, kelas, confidence)
+def detections(result):
+    boxes = result.boxes
+    return (
+        boxes.xyxy.cpu().numpy(),
+        boxes.cls.cpu().numpy().astype(int),
+        boxes.conf.cpu().numpy(),
+    )
+
+
+# Cocokkan deteksi backend dengan referensi PyTorch (IoU >= 0.5, kelas sama).
+# Mengembalikan (cocok, jumlah deteksi backend, jumlah referensi, selisih conf).
+def match(reference, candidate, iou_threshold=0.5):
+    ref_xyxy, ref_cls, ref_conf = reference
+    xyxy, cls, conf = candidate
+    if not len(ref_xyxy) or not len(xyxy):
+        return 0, len(xyxy), len(ref_xyxy), []
+
+    ious = iou_matrix(ref_xyxy, xyxy)
+    ious[ref_cls[:, None] != cls[None, :]] = 0.0
+    matched, conf_diff = 0, []
+    used_ref, used = set(), set()
+    order = np.dstack(np.unravel_index(np.argsort(-ious, axis=None), ious.shape))[0]
+    for ref_index, index in order:
+        if ious[ref_index, index] < iou_threshold:
+            break
+        if ref_index in used_ref or index in used:
+            continue
+        used_ref.add(ref_index)
+        used.add(index)
+        matched += 1
+        conf_diff.append(abs(float(ref_conf[ref_index]) - float(conf[index])))
+    return matched, len(xyxy), len(ref_xyxy), conf_diff
+
+
+def ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def run(model, frames):
+    results, latencies = [], []
+    for frame in frames:
+        started = time.perf_counter()
+        result = model(frame, verbose=False)[0]
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append(detections(result))
+    latencies.sort()
+    return results, {
+        "fps": round(1000 * len(latencies) / sum(latencies), 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bandingkan latensi dan akurasi backend inferensi YOLO."
+    )
+    parser.add_argument("--model", default="best.pt")
+    parser.add_argument("--source", help="Rekaman video dari kamera gerbang")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--int8", action="store_true", help="Uji juga varian INT8")
+    parser.add_argument(
+        "--data", help="Dataset YAML kelas parkir untuk kalibrasi INT8 OpenVINO"
+    )
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    variants = [(backend, False) for backend in args.backends]
+    if args.int8:
+        variants += [(b, True) for b in args.backends if b != "pytorch"]
+
+    # Hasil PyTorch FP32 menjadi referensi akurasi
+    reference, _ = run(SharedModel(args.model).warmup(), frames)
+
+    results = {"frames": len(frames), "backends": {}}
+    for backend, int8 in variants:
+        model = SharedModel(args.model, backend, int8, data=args.data).warmup()
+        outputs, timing = run(model, frames)
+
+        matched = predicted = expected = 0
+        conf_diff = []
+        for ref, candidate in zip(reference, outputs):
+            m, p, e, d = match(ref, candidate)
+            matched, predicted, expected = matched + m, predicted + p, expected + e
+            conf_diff += d
+
+        results["backends"][f"{backend}{'-int8' if int8 else ''}"] = {
+            **timing,
+            "precision_vs_pytorch": ratio(matched, predicted),
+            "recall_vs_pytorch": ratio(matched, expected),
+            "mean_conf_diff": (
+                round(statistics.mean(conf_diff), 4) if conf_diff else None
+            ),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from frame_encoding import JPEG_BACKEND, EncodedFrame, encode_jpeg
+
+
+# Ambil beberapa frame dari video/gambar, atau buat frame acak jika tidak ada
+def load_frames(source, count):
+    frames = []
+    if source:
+        cap = cv2.VideoCapture(source)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+        frames = [cv2.GaussianBlur(base, (9, 9), 0)] * count
+    return frames
+
+
+def bench(frames, fn):
+    started = time.perf_counter()
+    for frame in frames:
+        fn(frame)
+    elapsed = time.perf_counter() - started
+    return round(len(frames) / elapsed, 1)
+
+
+# Sebelum: setiap konsumen (disk, database, stream) meng-encode sendiri
+def encode_per_consumer(frame, consumers=3):
+    for _ in range(consumers):
+        cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+# Sesudah: satu EncodedFrame dipakai bersama oleh semua konsumen
+def encode_shared(frame, consumers=3):
+    encoded = EncodedFrame(frame)
+    for _ in range(consumers):
+        encoded.jpeg(90)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark encoding JPEG (frame/detik)."
+    )
+    parser.add_argument("--source", help="File video untuk diambil frame-nya")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--consumers", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    results = {
+        "backend": JPEG_BACKEND,
+        "resolution": f"{frames[0].shape[1]}x{frames[0].shape[0]}",
+        "opencv_single_fps": bench(
+            frames, lambda f: cv2.imencode(".jpg", f)[1].tobytes()
+        ),
+        "backend_single_fps": bench(frames, encode_jpeg),
+        "before_fps": bench(frames, lambda f: encode_per_consumer(f, args.consumers)),
+        "after_fps": bench(frames, lambda f: encode_shared(f, args.consumers)),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import glob
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from plate_ocr import pad_to_same_size, preprocess_image
+
+
+# Crop plat dari folder gambar, atau plat sintetis jika folder tidak diberikan
+def load_plates(source, count):
+    plates = []
+    if source:
+        for path in sorted(glob.glob(os.path.join(source, "*")))[:count]:
+            image = cv2.imread(path)
+            if image is not None:
+                plates.append(image)
+    rng = np.random.default_rng(0)
+    while len(plates) < count:
+        plate = np.full((60, 200, 3), 255, dtype=np.uint8)
+        text = f"B {rng.integers(1000, 9999)} XY"
+        cv2.putText(plate, text, (10, 42), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 0, 3)
+        plates.append(plate)
+    return plates
+
+
+def bench(repeat, fn):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - started) * 1000 / repeat, 1)
+
+
+# Sebelum: setiap plat di-preprocess dan dibaca dengan readtext sendiri
+def sequential(reader, plates):
+    return [reader.readtext(preprocess_image(plate)) for plate in plates]
+
+
+# Sesudah: semua plat satu frame dibaca dengan satu readtext_batched
+def batched(reader, plates):
+    images = pad_to_same_size([preprocess_image(plate) for plate in plates])
+    return reader.readtext_batched(images, batch_size=len(images))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark OCR plat per frame (milidetik/frame)."
+    )
+    parser.add_argument("--source", help="Folder berisi crop plat nomor")
+    parser.add_argument("--plates", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--gpu", action="store_true")
+    args = parser.parse_args()
+
+    import easyocr
+
+    reader = easyocr.Reader(["en", "id"], gpu=args.gpu)
+    all_plates = load_plates(args.source, max(args.plates))
+    batched(reader, all_plates[:1])  # Pemanasan
+
+    results = {}
+    for count in args.plates:
+        plates = all_plates[:count]
+        results[f"{count}_plates"] = {
+            "sequential_ms": bench(args.repeat, lambda: sequential(reader, plates)),
+            "batched_ms": bench(args.repeat, lambda: batched(reader, plates)),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+from postprocess import VEHICLE_CLASSES, Detections, crop_boxes, merge_tiles
+
+NAMES = {0: "motor", 1: "mobil", 2: "orang", 3: "plat"}
+
+
+# Hasil YOLO sintetis untuk adegan ramai: `boxes` box acak di frame 1280x720
+def crowded_result(boxes, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    xy = rng.uniform([0, 0], [1180, 620], (boxes, 2))
+    wh = rng.uniform(20, 100, (boxes, 2))
+    data = np.column_stack(
+        [
+            xy,
+            xy + wh,
+            rng.uniform(0.05, 1.0, boxes),
+            rng.integers(0, len(NAMES), boxes),
+        ]
+    ).astype(np.float32)
+    return Results(frame, path="", names=NAMES, boxes=torch.from_numpy(data))
+
+
+def bench(repeat, fn):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - started) * 1e6 / repeat, 1)
+
+
+# Sebelum: iterasi box satu per satu seperti di app2.py/interval2.py/inoutocr.py
+def per_box(result, frame):
+    detected_objects = []
+    crops = []
+    for box in result.boxes:
+        class_name = result.names[int(box.cls)]
+        if class_name in VEHICLE_CLASSES and float(box.conf) >= 0.25:
+            detected_objects.append(class_name)
+            x_min, y_min, x_max, y_max = map(int, box.xyxy[0])
+            crops.append(frame[y_min:y_max, x_min:x_max])
+    return detected_objects, crops
+
+
+# Sesudah: satu salinan ke CPU lalu operasi array
+def vectorized(result, frame):
+    vehicles = Detections.from_result(result).filter(classes=VEHICLE_CLASSES)
+    return vehicles.labels(), crop_boxes(frame, vehicles.xyxy)
+
+
+# NMS gabungan dua tile yang seluruh box-nya duplikat (area tumpang tindih)
+def tiles(result):
+    detections = Detections.from_result(result)
+    return merge_tiles([(detections, (0, 0)), (detections, (0, 0))])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark post-processing hasil YOLO (mikrodetik/frame)."
+    )
+    parser.add_argument("--boxes", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {}
+    for boxes in args.boxes:
+        result = crowded_result(boxes)
+        frame = result.orig_img
+        results[f"{boxes}_boxes"] = {
+            "per_box_us": bench(args.repeat, lambda: per_box(result, frame)),
+            "vectorized_us": bench(args.repeat, lambda: vectorized(result, frame)),
+            "tile_nms_us": bench(args.repeat, lambda: tiles(result)),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
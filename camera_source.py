@@ -0,0 +1,307 @@
+import logging
+import os
+import http.client
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger()
+
+# Decode JPEG pada 1/2, 1/4, atau 1/8 resolusi langsung di decoder (DCT
+# scaling), jauh lebih murah daripada decode penuh lalu resize. Koordinat di
+# roi_config.json harus mengikuti resolusi hasil decode.
+CAMERA_REDUCE = int(os.getenv("CAMERA_REDUCE", "1"))
+
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+_SOI = b"\xff\xd8"  # Awal gambar JPEG
+_EOI = b"\xff\xd9"  # Akhir gambar JPEG
+
+
+# Stream MJPEG lewat HTTP (mis. ESP32-S3 /stream). JPEG dipotong langsung
+# dari byte stream multipart dan di-decode dengan cv2.imdecode, sehingga
+# timeout socket berfungsi sebagai watchdog stall dan resolusi decode bisa
+# dikecilkan.
+class MjpegSource:
+    kind = "mjpeg"
+    interruptible = True  # close() dari thread lain membatalkan read()
+
+    def __init__(self, url, reduce=1, timeout=5.0, chunk_size=16384):
+        self.url = url
+        self.name = url
+        self.flags = _REDUCED_FLAGS[reduce]
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self._response = None
+        self._buffer = b""
+
+    def open(self):
+        self._response = urllib.request.urlopen(self.url, timeout=self.timeout)
+        self._buffer = b""
+
+    # Frame berikutnya; OSError jika koneksi putus atau timeout
+    def read(self):
+        while True:
+            start = self._buffer.find(_SOI)
+            end = self._buffer.find(_EOI, start + 2) if start >= 0 else -1
+            if end >= 0:
+                jpeg = self._buffer[start : end + 2]
+                self._buffer = self._buffer[end + 2 :]
+                frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), self.flags)
+                if frame is not None:
+                    return frame
+                continue  # JPEG rusak, lewati
+
+            if start > 0:
+                self._buffer = self._buffer[start:]  # Buang header multipart
+            response = self._response
+            if response is None:
+                raise OSError("Stream sudah ditutup")
+            chunk = response.read(self.chunk_size)
+            if not chunk:
+                raise OSError("Stream berakhir")
+            self._buffer += chunk
+
+    def close(self):
+        response, self._response = self._response, None
+        if response is not None:
+            response.close()
+
+
+# Kamera USB (indeks), file video, atau stream lain (RTSP) lewat
+# cv2.VideoCapture. Decode memakai akselerasi hardware FFmpeg jika tersedia,
+# dengan timeout buka/baca agar stream yang macet tidak memblokir selamanya.
+class OpenCvSource:
+    interruptible = False
+
+    def __init__(self, source, timeout=5.0, loop=False, width=None, height=None):
+        self.source = source
+        self.name = str(source)
+        self.kind = "usb" if isinstance(source, int) else "file"
+        if isinstance(source, str) and "://" in source:
+            self.kind = "stream"
+        self.timeout = timeout
+        self.loop = loop  # File diputar ulang dari awal saat habis
+        self.width = width  # Resolusi yang diminta ke driver kamera USB
+        self.height = height
+        self._cap = None
+
+    def _params(self):
+        params = []
+        if self.kind != "usb" and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        if self.kind == "stream" and hasattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC"):
+            timeout_ms = int(self.timeout * 1000)
+            params += [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms]
+            params += [cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms]
+        return params
+
+    def open(self):
+        params = self._params()
+        if params:
+            cap = cv2.VideoCapture(self.source, cv2.CAP_ANY, params)
+        else:
+            cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            raise OSError(f"Gagal membuka {self.source}")
+
+        # Kurangi buffer internal OpenCV agar frame yang dibaca selalu segar
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if self.kind == "usb" and self.width and self.height:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self._cap = cap
+
+    # Frame berikutnya, None jika file habis; OSError jika stream gagal
+    def read(self):
+        ret, frame = self._cap.read()
+        if ret:
+            return frame
+        if self.kind == "file":
+            if not self.loop:
+                return None
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read()
+            if ret:
+                return frame
+        raise OSError(f"Gagal membaca frame dari {self.source}")
+
+    def close(self):
+        cap, self._cap = self._cap, None
+        if cap is not None:
+            cap.release()
+
+
+# Pengganti cv2.VideoCapture yang tidak pernah menyerah: koneksi yang putus
+# atau macet dibuka ulang dengan backoff eksponensial ber-jitter, sehingga
+# FrameGrabber cukup terus memanggil read(). read() hanya mengembalikan
+# (False, None) setelah release() atau saat file (tanpa loop) habis.
+# Watchdog memutus stream yang tidak mengirim frame selama stall_timeout.
+class ResilientCapture:
+    def __init__(
+        self,
+        source,
+        stall_timeout=5.0,
+        backoff_initial=0.5,
+        backoff_max=30.0,
+        fps_window=60,
+    ):
+        self.source = source
+        self.stall_timeout = stall_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._connected_at = None  # None = tidak terhubung
+        self._reading_since = None
+        self._attempt = 0  # Percobaan koneksi gagal berturut-turut
+        self._ever_connected = False
+        self._frame_times = deque(maxlen=fps_window)
+        self._watchdog = None
+        self._started_at = time.monotonic()
+
+        # Statistik
+        self.frames = 0
+        self.reconnects = 0
+        self.stalls = 0
+        self.connected_seconds = 0.0
+
+    def isOpened(self):
+        return not self._closed.is_set()
+
+    # Tunggu sebelum mencoba lagi: backoff eksponensial dengan jitter agar
+    # banyak kamera yang putus bersamaan tidak menyambung ulang serempak.
+    # Dihitung ulang dari awal setelah ada frame yang berhasil dibaca.
+    def _backoff(self, reason):
+        delay = min(self.backoff_max, self.backoff_initial * 2**self._attempt)
+        self._attempt += 1
+        delay *= random.uniform(0.5, 1.0)
+        logger.warning(
+            f"Kamera {self.source.name}: {reason}, "
+            f"coba lagi dalam {delay:.1f} detik."
+        )
+        self._closed.wait(delay)
+
+    def _connect(self):
+        try:
+            self.source.open()
+        except (OSError, http.client.HTTPException, cv2.error) as e:
+            self._backoff(f"gagal dibuka ({e})")
+            return False
+
+        if self._ever_connected:
+            self.reconnects += 1
+            logger.info(f"Kamera {self.source.name} terhubung kembali.")
+        self._ever_connected = True
+        with self._lock:
+            self._connected_at = time.monotonic()
+        return True
+
+    def _disconnect(self):
+        with self._lock:
+            if self._connected_at is not None:
+                self.connected_seconds += time.monotonic() - self._connected_at
+                self._connected_at = None
+        self.source.close()
+
+    # Putus paksa stream yang sedang membaca lebih lama dari stall_timeout
+    def _watch(self):
+        while not self._closed.wait(self.stall_timeout / 2):
+            reading_since = self._reading_since
+            if (
+                reading_since is not None
+                and time.monotonic() - reading_since > self.stall_timeout
+            ):
+                self.stalls += 1
+                self._reading_since = None
+                logger.warning(f"Kamera {self.source.name} macet, memutus koneksi.")
+                self.source.close()
+
+    def read(self):
+        if self._watchdog is None and self.source.interruptible:
+            self._watchdog = threading.Thread(
+                target=self._watch, name="camera-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+        while not self._closed.is_set():
+            if self._connected_at is None and not self._connect():
+                continue
+
+            self._reading_since = time.monotonic()
+            try:
+                frame = self.source.read()
+            except (
+                OSError,
+                ValueError,
+                AttributeError,
+                http.client.HTTPException,  # mis. IncompleteRead saat stream putus
+                cv2.error,
+            ) as e:
+                self._disconnect()
+                if not self._closed.is_set():
+                    self._backoff(f"terputus ({e})")
+                continue
+            finally:
+                self._reading_since = None
+
+            if frame is None:  # File habis
+                self._disconnect()
+                return False, None
+
+            self._attempt = 0
+            self._frame_times.append(time.monotonic())
+            self.frames += 1
+            return True, frame
+        return False, None
+
+    def release(self):
+        self._closed.set()
+        self._disconnect()
+
+    def fps(self):
+        times = list(self._frame_times)
+        if len(times) < 2 or time.monotonic() - times[-1] > self.stall_timeout:
+            return 0.0
+        return (len(times) - 1) / max(times[-1] - times[0], 1e-9)
+
+    def stats(self):
+        with self._lock:
+            connected_at = self._connected_at
+            uptime = self.connected_seconds
+        if connected_at is not None:
+            uptime += time.monotonic() - connected_at
+        lifetime = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            "source_kind": self.source.kind,
+            "connected": connected_at is not None,
+            "uptime_seconds": round(uptime, 1),
+            "uptime_ratio": round(uptime / lifetime, 4),
+            "fps": round(self.fps(), 2),
+            "reconnects": self.reconnects,
+            "stalls": self.stalls,
+        }
+
+
+# Buka sumber kamera: URL http(s) -> MJPEG, angka -> kamera USB, selain itu
+# file video atau stream lain lewat OpenCV
+def open_camera(source, reduce=CAMERA_REDUCE, loop=False, stall_timeout=5.0):
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    if isinstance(source, str) and source.startswith(("http://", "https://")):
+        backend = MjpegSource(source, reduce=reduce, timeout=stall_timeout)
+    else:
+        backend = OpenCvSource(source, timeout=stall_timeout, loop=loop)
+    return ResilientCapture(backend, stall_timeout=stall_timeout)
@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+
+from metrics import Histogram
+
+logger = logging.getLogger()
+
+# Frame yang dibaca beserta waktu tangkap (time.monotonic) dan nomor urutnya
+CapturedFrame = namedtuple("CapturedFrame", ["frame", "captured_at", "seq"])
+
+# Frame yang lebih tua dari ini (detik) dianggap basi, mis. kamera sedang
+# tersambung ulang dan hanya frame terakhir sebelum putus yang tersedia
+MAX_FRAME_AGE = 5.0
+
+
+# Thread pembaca kamera yang hanya menyimpan frame terbaru (drop-oldest).
+# Loop inferensi mengambil frame lewat read(), sehingga buffer MJPEG kamera
+# tetap dikuras walaupun model YOLO sedang berjalan. Dengan
+# camera_source.ResilientCapture koneksi yang putus dibuka ulang di dalam
+# cap.read(), jadi grabber hanya berhenti saat dihentikan atau file habis.
+class FrameGrabber:
+    def __init__(self, cap, name="kamera"):
+        self.cap = cap
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._captured_at = 0.0
+        self._seq = 0  # Nomor frame terakhir yang dibaca dari kamera
+        self._taken_seq = 0  # Nomor frame terakhir yang diambil konsumen
+        self._running = False
+        self._thread = None
+
+        # Statistik
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self.latency = Histogram()  # Latensi capture -> keputusan (detik)
+        self.decode_latency = Histogram()  # Durasi cap.read() (tunggu + decode)
+
+        # Kurangi buffer internal OpenCV agar frame yang dibaca selalu segar
+        if hasattr(self.cap, "set"):
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name=f"grabber-{self.name}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while self._running:
+            started = time.monotonic()
+            try:
+                ret, frame = self.cap.read()
+            except Exception as e:
+                # Thread berhenti dengan jelas agar konsumen tidak menunggu
+                # frame yang tidak akan pernah datang
+                logger.error(f"Error membaca {self.name}: {e}")
+                ret, frame = False, None
+            if not ret:
+                with self._cond:
+                    self.read_failures += 1
+                    self._running = False
+                    self._cond.notify_all()
+                logger.error(f"Gagal membaca frame dari {self.name}")
+                break
+
+            now = time.monotonic()
+            self.decode_latency.observe(now - started)
+            with self._cond:
+                # Frame sebelumnya belum diambil siapa pun -> dibuang
+                if self._seq > self._taken_seq:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._captured_at = now
+                self._seq += 1
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+    def is_alive(self):
+        return self._running
+
+    # Ambil frame yang lebih baru dari after_seq. Jika after_seq tidak diisi,
+    # dipakai nomor frame terakhir yang sudah diambil (mode satu konsumen).
+    # Mengembalikan None jika timeout atau grabber sudah berhenti.
+    def read(self, after_seq=None, timeout=None):
+        with self._cond:
+            if after_seq is None:
+                after_seq = self._taken_seq
+            self._cond.wait_for(
+                lambda: self._seq > after_seq or not self._running, timeout
+            )
+            if self._seq <= after_seq:
+                return None
+            self._taken_seq = max(self._taken_seq, self._seq)
+            return CapturedFrame(self._frame, self._captured_at, self._seq)
+
+    # Catat latensi dari frame ditangkap sampai keputusan gerbang diambil
+    def mark_decision(self, captured_at):
+        self.latency.observe(time.monotonic() - captured_at)
+
+    # Umur frame terbaru dalam detik; None jika belum ada frame
+    def frame_age(self):
+        with self._cond:
+            if self._seq == 0:
+                return None
+            return time.monotonic() - self._captured_at
+
+    def stats(self):
+        age = self.frame_age()
+        return {
+            "camera": self.name,
+            "last_frame_age": round(age, 2) if age is not None else None,
+            "frames_captured": self.frames_captured,
+            "frames_dropped": self.frames_dropped,
+            "read_failures": self.read_failures,
+            "decision_latency": self.latency.snapshot(),
+            "decode_latency": self.decode_latency.snapshot(),
+            # Uptime, FPS, dan jumlah reconnect dari ResilientCapture
+            **(self.cap.stats() if hasattr(self.cap, "stats") else {}),
+        }
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self.cap.release()
@@ -0,0 +1,144 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from metrics import Histogram
+
+logger = logging.getLogger()
+
+_STOP = object()
+
+
+# Penulis database di background (write-behind). Loop video cukup memanggil
+# submit(); baris dikumpulkan di antrean terbatas lalu disimpan sekaligus
+# dengan bulk insert saat jumlahnya mencapai batch_size atau setiap
+# flush_interval detik, mana yang lebih dulu.
+#
+# Jika antrean penuh, submit() menunggu paling lama put_timeout detik
+# (backpressure) lalu membuang baris tersebut dan mencatatnya di statistik.
+#
+# Listener (add_listener) dipanggil dengan daftar baris di thread writer, di
+# dalam app context dan transaksi batch sebelum commit (tanpa commit sendiri),
+# sehingga tulisan listener tersimpan atau dibatalkan bersama batchnya. Jika
+# listener punya after_commit(rows), method itu dipanggil setelah commit.
+class DetectionWriter:
+    def __init__(
+        self,
+        app,
+        db,
+        model,
+        batch_size=50,
+        flush_interval=2.0,
+        max_queue=1000,
+        put_timeout=0.5,
+    ):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._listeners = []
+
+        # Statistik
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.flush_latency = Histogram()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="detection-writer", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+        return self
+
+    # Masukkan satu baris (kolom=nilai) ke antrean.
+    # Mengembalikan False jika baris dibuang karena antrean penuh.
+    def submit(self, **row):
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Antrean database penuh, deteksi dibuang.")
+            return False
+        self.submitted += 1
+        return True
+
+    def _run(self):
+        rows = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                row = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                row = None
+
+            if row is _STOP:
+                self._flush(rows)
+                return
+            if row is not None:
+                rows.append(row)
+
+            if len(rows) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(rows)
+                rows = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, rows):
+        if not rows:
+            return
+        started = time.monotonic()
+        with self.app.app_context():
+            try:
+                self.db.session.bulk_insert_mappings(self.model, rows)
+                for listener in self._listeners:
+                    listener(rows)
+                self.db.session.commit()
+                self.written += len(rows)
+            except Exception as e:
+                self.db.session.rollback()
+                self.failed += len(rows)
+                logger.error(f"Error saving to database: {e}")
+            else:
+                for listener in self._listeners:
+                    if not hasattr(listener, "after_commit"):
+                        continue
+                    try:
+                        listener.after_commit(rows)
+                    except Exception as e:
+                        logger.error(f"Listener writer gagal: {e}")
+        self.flushes += 1
+        self.flush_latency.observe(time.monotonic() - started)
+
+    # Hentikan writer dan simpan sisa antrean
+    def stop(self, timeout=10):
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "flush_latency": self.flush_latency.snapshot(),
+        }
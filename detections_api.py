@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+from marshmallow import fields
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import load_only
+
+from models import ma, Detection
+
+detections_api = Blueprint("detections_api", __name__)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+# Skema keluaran API riwayat (tanpa kolom BLOB)
+class DetectionSchema(ma.Schema):
+    id = fields.Integer()
+    timestamp = fields.DateTime()
+    detected_objects = fields.String()
+    image_ref = fields.String()
+    image_path = fields.String()
+    plate_number = fields.String()
+    confidence_plate = fields.String()
+    start_parking = fields.DateTime()
+    finish_parking = fields.DateTime()
+    total_time = fields.Integer()
+
+
+detections_schema = DetectionSchema(many=True)
+
+# Hanya kolom ini yang dibaca dari database
+_COLUMNS = [getattr(Detection, name) for name in detections_schema.fields]
+
+
+# Cursor keyset: "<timestamp ISO>|<id>" dari baris terakhir halaman sebelumnya
+def encode_cursor(detection):
+    return f"{detection.timestamp.isoformat()}|{detection.id}"
+
+
+def decode_cursor(cursor):
+    timestamp, detection_id = cursor.rsplit("|", 1)
+    return datetime.fromisoformat(timestamp), int(detection_id)
+
+
+# GET /detections?start=&end=&class=&plate=&limit=&cursor=
+# Riwayat deteksi terbaru lebih dulu, dipaginasi dengan keyset
+# (timestamp, id) sehingga halaman ke-N sama cepatnya dengan halaman pertama.
+@detections_api.route("/detections", methods=["GET"])
+def list_detections():
+    try:
+        start = request.args.get("start", type=datetime.fromisoformat)
+        end = request.args.get("end", type=datetime.fromisoformat)
+        limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+        cursor = request.args.get("cursor")
+        cursor = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({"error": "Parameter tidak valid"}), 400
+    limit = max(1, min(limit, MAX_LIMIT))
+    object_class = request.args.get("class")
+    plate = request.args.get("plate")
+
+    query = Detection.query.options(load_only(*_COLUMNS))
+    if start is not None:
+        query = query.filter(Detection.timestamp >= start)
+    if end is not None:
+        query = query.filter(Detection.timestamp < end)
+    if object_class:
+        query = query.filter(Detection.detected_objects.contains(object_class))
+    if plate:
+        query = query.filter(Detection.plate_number == plate)
+    if cursor is not None:
+        query = query.filter(
+            tuple_(Detection.timestamp, Detection.id)
+            < tuple_(*[literal(value) for value in cursor])
+        )
+
+    rows = (
+        query.order_by(Detection.timestamp.desc(), Detection.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > len(items) else None
+
+    return jsonify(
+        {"items": detections_schema.dump(items), "next_cursor": next_cursor}
+    )
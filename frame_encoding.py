@@ -0,0 +1,70 @@
+import logging
+import os
+
+import cv2
+
+logger = logging.getLogger()
+
+_ENCODE_PARAMS = {
+    "jpg": cv2.IMWRITE_JPEG_QUALITY,
+    "webp": cv2.IMWRITE_WEBP_QUALITY,
+}
+
+# Pakai libjpeg-turbo (PyTurboJPEG) jika terpasang, kecuali dimatikan lewat
+# JPEG_BACKEND=opencv
+_turbo = None
+if os.getenv("JPEG_BACKEND", "turbojpeg") == "turbojpeg":
+    try:
+        from turbojpeg import TurboJPEG
+
+        _turbo = TurboJPEG()
+    except Exception:  # Modul atau library libturbojpeg tidak tersedia
+        _turbo = None
+
+JPEG_BACKEND = "turbojpeg" if _turbo is not None else "opencv"
+
+
+# Encode frame BGR ke JPEG
+def encode_jpeg(frame, quality=90):
+    if _turbo is not None:
+        return _turbo.encode(frame, quality=quality)
+    ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Gagal meng-encode frame ke jpg")
+    return buffer.tobytes()
+
+
+# Encode frame ke format apa pun yang didukung (jpg, webp)
+def encode_image(frame, ext="jpg", quality=90):
+    if ext == "jpg":
+        return encode_jpeg(frame, quality)
+    ok, buffer = cv2.imencode(f".{ext}", frame, [_ENCODE_PARAMS[ext], quality])
+    if not ok:
+        raise ValueError(f"Gagal meng-encode frame ke {ext}")
+    return buffer.tobytes()
+
+
+# Frame yang di-encode paling banyak sekali per (format, kualitas). Buffer
+# yang sama dipakai ulang untuk disk, database, dan streaming.
+class EncodedFrame:
+    def __init__(self, frame):
+        self.frame = frame
+        self._cache = {}
+
+    def encode(self, ext="jpg", quality=90):
+        key = (ext, quality)
+        data = self._cache.get(key)
+        if data is None:
+            data = encode_image(self.frame, ext, quality)
+            self._cache[key] = data
+        return data
+
+    def jpeg(self, quality=90):
+        return self.encode("jpg", quality)
+
+
+# Bungkus frame menjadi EncodedFrame jika belum
+def as_encoded(frame):
+    if isinstance(frame, EncodedFrame):
+        return frame
+    return EncodedFrame(frame)
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import tempfile
+import time
+
+from frame_encoding import as_encoded
+from metrics import Histogram
+
+# Tingkat kualitas penyimpanan: nama -> (format, kualitas)
+QUALITY_TIERS = {
+    "full": ("jpg", 90),
+    "standard": ("jpg", 75),
+    "archive": ("webp", 60),
+}
+
+
+# Antarmuka penyimpanan gambar. Baris database hanya menyimpan referensi
+# (hash isi + ekstensi), bukan byte gambarnya.
+class FrameStore:
+    def __init__(self):
+        self.encode_latency = Histogram()  # Encode frame ke JPEG/WebP (detik)
+        self.write_latency = Histogram()  # Simpan byte gambar (detik)
+
+    def put(self, image_bytes, ext="jpg"):
+        raise NotImplementedError
+
+    def get(self, ref):
+        raise NotImplementedError
+
+    def exists(self, ref):
+        raise NotImplementedError
+
+    def delete(self, ref):
+        raise NotImplementedError
+
+    # Encode frame (atau EncodedFrame) sesuai tier lalu simpan
+    def put_frame(self, frame, tier="full"):
+        ext, quality = QUALITY_TIERS[tier]
+        started = time.perf_counter()
+        image_bytes = as_encoded(frame).encode(ext, quality)
+        encoded = time.perf_counter()
+        ref = self.put(image_bytes, ext=ext)
+        self.encode_latency.observe(encoded - started)
+        self.write_latency.observe(time.perf_counter() - encoded)
+        return ref
+
+    def stats(self):
+        return {
+            "encode_latency": self.encode_latency.snapshot(),
+            "write_latency": self.write_latency.snapshot(),
+        }
+
+
+# Penyimpanan di filesystem lokal, dialamatkan dengan SHA-256 dan dibagi ke
+# subfolder dua tingkat (ab/cd/abcd....jpg). Gambar yang sama hanya
+# disimpan sekali.
+class LocalFrameStore(FrameStore):
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+
+    def path_for(self, ref):
+        return os.path.join(self.root, ref[:2], ref[2:4], ref)
+
+    def put(self, image_bytes, ext="jpg"):
+        ref = f"{hashlib.sha256(image_bytes).hexdigest()}.{ext}"
+        path = self.path_for(ref)
+        if os.path.exists(path):
+            return ref  # Sudah ada, tidak perlu ditulis ulang
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Tulis ke file sementara lalu rename agar tidak ada file setengah jadi
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(image_bytes)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return ref
+
+    def get(self, ref):
+        with open(self.path_for(ref), "rb") as f:
+            return f.read()
+
+    def exists(self, ref):
+        return os.path.exists(self.path_for(ref))
+
+    def delete(self, ref):
+        try:
+            os.remove(self.path_for(ref))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,190 @@
+import logging
+import queue
+import threading
+import time
+
+from metrics import Histogram
+
+logger = logging.getLogger()
+
+_STOP = object()
+
+
+# Callback on_publish bersama untuk beberapa dispatcher pada satu client MQTT.
+# paho hanya menyimpan satu on_publish, jadi PUBACK diteruskan ke semua
+# dispatcher; masing-masing hanya mencocokkan mid yang ia kirim sendiri (mid
+# unik per client).
+class _PublishFanout:
+    def __init__(self):
+        self.callbacks = []
+
+    def __call__(self, *args):
+        for callback in list(self.callbacks):
+            callback(*args)
+
+
+# Pengirim perintah gerbang ke MQTT di thread sendiri. Loop video cukup
+# memanggil send(); perintah yang sama dalam jendela `debounce` detik
+# diabaikan agar servo tidak dibanjiri, lalu perintah dikirim dengan QoS 1.
+# Broker yang lambat hanya memperpanjang antrean, tidak menahan deteksi.
+#
+# Latensi publish -> ack (PUBACK) dicatat lewat callback on_publish, sehingga
+# client MQTT harus menjalankan loop jaringan (loop_start). Beberapa
+# dispatcher (mis. satu per gerbang) boleh memakai client yang sama.
+class GateCommandDispatcher:
+    def __init__(
+        self,
+        client,
+        topic,
+        debounce=3.0,
+        qos=1,
+        max_queue=32,
+        ack_timeout=10.0,
+    ):
+        self.client = client
+        self.topic = topic
+        self.debounce = debounce  # Jendela debounce per perintah (detik)
+        self.qos = qos
+        self.ack_timeout = ack_timeout  # Publish tanpa ack lebih lama = gagal
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_sent = {}  # perintah -> waktu terakhir diterima
+        self._pending = {}  # mid -> waktu publish
+        self._early_acks = {}  # mid -> waktu ack yang datang sebelum dicatat
+
+        # Statistik
+        self.accepted = 0
+        self.debounced = 0
+        self.dropped = 0
+        self.published = 0
+        self.acked = 0
+        self.unacked = 0
+        self.failed = 0
+        self.queue_latency = Histogram()  # send() sampai publish
+        self.ack_latency = Histogram()  # publish sampai PUBACK
+
+    def start(self):
+        if self._thread is None:
+            fanout = getattr(self.client, "on_publish", None)
+            if not isinstance(fanout, _PublishFanout):
+                fanout = _PublishFanout()
+                self.client.on_publish = fanout
+            fanout.callbacks.append(self._on_publish)
+            self._thread = threading.Thread(
+                target=self._run, name="gate-commands", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    # Antrekan satu perintah. Mengembalikan False jika perintah di-debounce
+    # atau antrean penuh.
+    def send(self, command):
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_sent.get(command)
+            if last is not None and now - last < self.debounce:
+                self.debounced += 1
+                return False
+            self._last_sent[command] = now
+
+        try:
+            self._queue.put_nowait((command, now))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Antrean perintah gerbang penuh, '{command}' dibuang.")
+            return False
+        self.accepted += 1
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                self._expire_pending()
+                continue
+            if item is _STOP:
+                return
+
+            command, queued_at = item
+            self.queue_latency.observe(time.monotonic() - queued_at)
+            self._publish(command)
+            self._expire_pending()
+
+    def _publish(self, command):
+        try:
+            info = self.client.publish(self.topic, command, qos=self.qos)
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Gagal mengirim perintah '{command}': {e}")
+            return
+        if info.rc != 0:
+            self.failed += 1
+            logger.error(f"Gagal mengirim perintah '{command}'. Kode: {info.rc}")
+            return
+
+        published_at = time.monotonic()
+        self.published += 1
+        with self._lock:
+            acked_at = self._early_acks.pop(info.mid, None)
+            if acked_at is None:
+                self._pending[info.mid] = published_at
+        if acked_at is not None:
+            self._record_ack(max(0.0, acked_at - published_at))
+        logger.info(f"Perintah '{command}' dikirim ke broker MQTT.")
+
+    # Callback paho (v1: client, userdata, mid; v2: + reason_code, properties)
+    def _on_publish(self, client, userdata, mid, *args):
+        acked_at = time.monotonic()
+        with self._lock:
+            published_at = self._pending.pop(mid, None)
+            if published_at is None:
+                self._early_acks[mid] = acked_at
+        if published_at is not None:
+            self._record_ack(acked_at - published_at)
+
+    def _record_ack(self, latency):
+        self.acked += 1
+        self.ack_latency.observe(latency)
+
+    # Publish yang tidak pernah di-ack dalam ack_timeout dianggap hilang
+    def _expire_pending(self):
+        deadline = time.monotonic() - self.ack_timeout
+        with self._lock:
+            expired = [mid for mid, at in self._pending.items() if at < deadline]
+            for mid in expired:
+                del self._pending[mid]
+            self._early_acks = {
+                mid: at for mid, at in self._early_acks.items() if at >= deadline
+            }
+        if expired:
+            self.unacked += len(expired)
+            logger.warning(f"{len(expired)} perintah gerbang tidak di-ack broker.")
+
+    def stop(self, timeout=5):
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        fanout = getattr(self.client, "on_publish", None)
+        if isinstance(fanout, _PublishFanout) and self._on_publish in fanout.callbacks:
+            fanout.callbacks.remove(self._on_publish)
+
+    def stats(self):
+        with self._lock:
+            awaiting_ack = len(self._pending)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "awaiting_ack": awaiting_ack,
+            "accepted": self.accepted,
+            "debounced": self.debounced,
+            "dropped": self.dropped,
+            "published": self.published,
+            "acked": self.acked,
+            "unacked": self.unacked,
+            "failed": self.failed,
+            "queue_latency": self.queue_latency.snapshot(),
+            "ack_latency": self.ack_latency.snapshot(),
+        }
@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+
+from metrics import Histogram, registry
+
+logger = logging.getLogger()
+
+
+# Satu sumber kamera yang terdaftar di engine
+class _Source:
+    def __init__(self, name, grabber, handler, gate, roi):
+        self.name = name
+        self.grabber = grabber
+        self.handler = handler
+        self.gate = gate
+        self.roi = roi
+        self.last_seq = 0
+
+
+# Layanan inferensi bersama untuk beberapa gerbang. Frame terbaru dari setiap
+# kamera dikumpulkan, dijalankan ke YOLO sebagai satu batch, lalu hasilnya
+# dikirim ke handler masing-masing gerbang: handler(captured, result).
+#
+# gate(captured) opsional: jika mengembalikan False, frame tidak ikut batch
+# dan handler dipanggil dengan result=None (misalnya untuk interval deteksi).
+# roi opsional (RoiCropper): frame dipotong ke area jalur sebelum inferensi dan
+# box hasil deteksi dipetakan kembali ke frame asli sebelum dikirim ke handler.
+class BatchInferenceEngine:
+    def __init__(self, model, poll_interval=0.005):
+        self.model = model  # SharedModel dari model_registry
+        self.poll_interval = poll_interval
+        self._sources = []
+        self._running = False
+        self._thread = None
+
+        # Statistik
+        self.batches = 0
+        self.frames_processed = 0
+        self.frames_inferred = 0
+        self.inference_latency = Histogram()  # Satu batch YOLO (detik)
+        self.handler_latency = Histogram()  # Satu panggilan handler (detik)
+
+    def add_source(self, name, grabber, handler, gate=None, roi=None):
+        self._sources.append(_Source(name, grabber, handler, gate, roi))
+        return self
+
+    def _dispatch(self, source, captured, result):
+        started = time.perf_counter()
+        try:
+            source.handler(captured, result)
+        except Exception as e:
+            logger.error(f"Handler {source.name} gagal: {e}")
+        self.handler_latency.observe(time.perf_counter() - started)
+
+    # Satu putaran: ambil frame baru dari semua kamera dan jalankan satu batch.
+    # Mengembalikan jumlah frame yang diproses.
+    def run_once(self):
+        batch = []
+        processed = 0
+        for source in self._sources:
+            captured = source.grabber.read(after_seq=source.last_seq, timeout=0)
+            if captured is None:
+                continue
+            source.last_seq = captured.seq
+            processed += 1
+            self.frames_processed += 1
+            if source.gate is not None:
+                with registry.stage("gate"):
+                    passed = source.gate(captured)
+                if not passed:
+                    self._dispatch(source, captured, None)
+                    continue
+            batch.append((source, captured))
+
+        if batch:
+            frames = []
+            for source, captured in batch:
+                frame = captured.frame
+                if source.roi is not None:
+                    with registry.stage("resize"):
+                        frame = source.roi.crop(frame)
+                frames.append(frame)
+            started = time.perf_counter()
+            results = self.model(frames, verbose=False)
+            self.inference_latency.observe(time.perf_counter() - started)
+            self.batches += 1
+            self.frames_inferred += len(batch)
+            for (source, captured), result in zip(batch, results):
+                if source.roi is not None:
+                    result = source.roi.map_result(result, captured.frame)
+                self._dispatch(source, captured, result)
+
+        return processed
+
+    def run(self):
+        self._running = True
+        while self._running:
+            if not any(source.grabber.is_alive() for source in self._sources):
+                logger.error("Semua kamera berhenti, engine inferensi dihentikan.")
+                break
+            if self.run_once() == 0:
+                time.sleep(self.poll_interval)
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(
+            target=self.run, name="inference-engine", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def is_running(self):
+        return self._running
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "frames_processed": self.frames_processed,
+            "frames_inferred": self.frames_inferred,
+            "avg_batch_size": (
+                self.frames_inferred / self.batches if self.batches else 0.0
+            ),
+            "inference_latency": self.inference_latency.snapshot(),
+            "handler_latency": self.handler_latency.snapshot(),
+            # Statistik gate per sumber (MotionGate, SensorTrigger, ...)
+            "gates": {
+                source.name: source.gate.stats()
+                for source in self._sources
+                if hasattr(source.gate, "stats")
+            },
+        }
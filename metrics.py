@@ -0,0 +1,203 @@
+import bisect
+import os
+import re
+import threading
+import time
+
+# Layer metrik (timer per tahap dan endpoint /metrics), aktif dengan
+# METRICS_ENABLED=1. Saat mati, registry.stage() mengembalikan timer kosong
+# sehingga biayanya hanya satu pengecekan flag.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+
+# Batas bucket default (detik) untuk histogram latensi
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Histogram sederhana yang aman dipakai dari banyak thread
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Bucket terakhir = +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    # Perkiraan persentil berdasarkan batas atas bucket
+    def percentile(self, q):
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            target = q * self.count
+            running = 0
+            for index, bucket_count in enumerate(self.counts):
+                running += bucket_count
+                if running >= target:
+                    if index < len(self.buckets):
+                        return self.buckets[index]
+                    return self.max
+            return self.max
+
+    # (batas bucket, jumlah per bucket, count, total) untuk format Prometheus
+    def export(self):
+        with self._lock:
+            return self.buckets, list(self.counts), self.count, self.total
+
+    def snapshot(self):
+        with self._lock:
+            count = self.count
+            total = self.total
+            maximum = self.max
+        return {
+            "count": count,
+            "avg": total / count if count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": maximum,
+        }
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _render_histogram(samples, name, histogram, labels):
+    buckets, counts, count, total = histogram.export()
+    running = 0
+    for bound, bucket_count in zip(buckets, counts):
+        running += bucket_count
+        bucket_labels = _format_labels({**labels, "le": bound})
+        samples.append(f"{name}_bucket{bucket_labels} {running}")
+    bucket_labels = _format_labels({**labels, "le": "+Inf"})
+    samples.append(f"{name}_bucket{bucket_labels} {count}")
+    samples.append(f"{name}_sum{_format_labels(labels)} {total}")
+    samples.append(f"{name}_count{_format_labels(labels)} {count}")
+
+
+# Registry metrik per proses. Komponen yang sudah punya Histogram dan stats()
+# (FrameGrabber, BatchInferenceEngine, DetectionWriter, GateCommandDispatcher,
+# OcrWorkerPool, FrameStore, ...) cukup didaftarkan dengan register(); isinya
+# baru dibaca saat /metrics di-scrape. Tahap yang belum punya histogram
+# diukur dengan `with registry.stage("plot"): ...`.
+class MetricsRegistry:
+    def __init__(self, enabled=METRICS_ENABLED, namespace="parking"):
+        self.enabled = enabled
+        self.namespace = namespace
+        self._stages = {}  # nama tahap -> Histogram
+        self._components = {}  # (prefix, label) -> (komponen, label)
+        self._lock = threading.Lock()
+
+    # Timer untuk satu tahap pipeline (context manager)
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        histogram = self._stages.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(name, Histogram())
+        return _StageTimer(histogram)
+
+    # Daftarkan komponen; komponen baru dengan prefix dan label yang sama
+    # (mis. kamera yang dibuka ulang) menggantikan yang lama
+    def register(self, prefix, component, **labels):
+        if self.enabled:
+            key = (prefix, tuple(sorted(labels.items())))
+            with self._lock:
+                self._components[key] = (component, labels)
+        return component
+
+    # Semua metrik dalam format teks Prometheus
+    def render(self):
+        families = {}  # nama -> (tipe, [baris sampel])
+
+        def family(name, kind):
+            return families.setdefault(name, (kind, []))[1]
+
+        with self._lock:
+            stages = list(self._stages.items())
+            components = list(self._components.items())
+
+        stage_name = f"{self.namespace}_stage_seconds"
+        for stage, histogram in stages:
+            _render_histogram(
+                family(stage_name, "histogram"), stage_name, histogram, {"stage": stage}
+            )
+
+        for (prefix, _), (component, labels) in components:
+            base = _metric_name(f"{self.namespace}_{prefix}")
+            for attr, value in vars(component).items():
+                name = f"{base}_{_metric_name(attr)}_seconds"
+                if isinstance(value, Histogram):
+                    _render_histogram(family(name, "histogram"), name, value, labels)
+                elif isinstance(value, dict) and value and all(
+                    isinstance(item, Histogram) for item in value.values()
+                ):
+                    for key, histogram in value.items():
+                        _render_histogram(
+                            family(name, "histogram"),
+                            name,
+                            histogram,
+                            {**labels, "stage": key},
+                        )
+
+            stats = component.stats() if hasattr(component, "stats") else {}
+            for key, value in stats.items():
+                if isinstance(value, (bool, int, float)):
+                    name = f"{base}_{_metric_name(key)}"
+                    family(name, "gauge").append(
+                        f"{name}{_format_labels(labels)} {float(value)}"
+                    )
+
+        lines = []
+        for name, (kind, samples) in families.items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
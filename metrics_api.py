@@ -0,0 +1,43 @@
+import logging
+import os
+import threading
+
+from flask import Blueprint, Flask, Response, jsonify
+
+from metrics import registry
+
+logger = logging.getLogger()
+
+metrics_api = Blueprint("metrics_api", __name__)
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+
+# GET /metrics
+# Histogram per tahap, jumlah frame yang dibuang, dan kedalaman antrean dalam
+# format teks Prometheus
+@metrics_api.route("/metrics", methods=["GET"])
+def get_metrics():
+    if not registry.enabled:
+        return jsonify({"error": "Metrik tidak aktif (METRICS_ENABLED=1)"}), 404
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+# Untuk skrip gerbang tanpa server HTTP: jalankan /metrics (dan blueprint
+# tambahan, mis. /preview pada mode headless) di thread daemon
+def serve_metrics(port=METRICS_PORT, host="0.0.0.0", blueprints=()):
+    if not registry.enabled and not blueprints:
+        return None
+    app = Flask("metrics")
+    app.register_blueprint(metrics_api)
+    for blueprint in blueprints:
+        app.register_blueprint(blueprint)
+    thread = threading.Thread(
+        target=app.run,
+        kwargs={"host": host, "port": port, "threaded": True, "use_reloader": False},
+        name="metrics-server",
+        daemon=True,
+    )
+    thread.start()
+    logger.info(f"Server metrik/pratinjau berjalan di http://{host}:{port}")
+    return thread
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+
+from frame_encoding import encode_jpeg
+from metrics import Histogram
+
+logger = logging.getLogger()
+
+_BOUNDARY = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
+
+
+# Satu penonton stream. Buffer dibatasi buffer_size frame; penonton yang
+# lambat kehilangan frame terlama (drop-oldest), bukan menahan produsen.
+class _Subscriber:
+    def __init__(self, width, fps, buffer_size):
+        self.width = width  # None = resolusi asli
+        self.interval = 1.0 / fps if fps else 0.0
+        self.next_due = 0.0
+        self.sent = 0
+        self.dropped = 0
+        self._frames = deque(maxlen=buffer_size)
+
+    # Apakah penonton ini perlu frame baru (batas fps per penonton)
+    def due(self, now):
+        if now < self.next_due:
+            return False
+        self.next_due = now + self.interval
+        return True
+
+    def _append(self, data):
+        if len(self._frames) == self._frames.maxlen:
+            self.dropped += 1
+        self._frames.append(data)
+
+
+# Penonton untuk server thread (Flask): get() memblokir sampai ada frame
+class _ThreadSubscriber(_Subscriber):
+    def __init__(self, width, fps, buffer_size):
+        super().__init__(width, fps, buffer_size)
+        self._cond = threading.Condition()
+
+    def push(self, data):
+        with self._cond:
+            self._append(data)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._frames, timeout):
+                return None
+            self.sent += 1
+            return self._frames.popleft()
+
+
+# Penonton untuk server asyncio: frame dimasukkan lewat event loop-nya
+class _AsyncSubscriber(_Subscriber):
+    def __init__(self, width, fps, buffer_size, loop):
+        super().__init__(width, fps, buffer_size)
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def push(self, data):
+        self._loop.call_soon_threadsafe(self._push_in_loop, data)
+
+    def _push_in_loop(self, data):
+        self._append(data)
+        self._event.set()
+
+    async def get(self, timeout=None):
+        if not self._frames:
+            self._event.clear()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        self.sent += 1
+        return self._frames.popleft()
+
+
+# Penyiar MJPEG: satu produsen per kamera memanggil publish(frame), lalu
+# frame di-resize dan di-encode sekali per resolusi yang sedang ditonton dan
+# dibagikan ke semua penonton. Tanpa penonton, tidak ada encode sama sekali.
+class MjpegBroadcaster:
+    def __init__(self, quality=80, buffer_size=2):
+        self.quality = quality
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+        # Statistik
+        self.frames_published = 0
+        self.frames_encoded = 0
+        self.dropped_closed = 0  # Frame terbuang milik penonton yang sudah pergi
+        self.encode_latency = Histogram()
+
+    def subscribe(self, width=None, fps=None):
+        subscriber = _ThreadSubscriber(width, fps, self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def subscribe_async(self, width=None, fps=None):
+        loop = asyncio.get_running_loop()
+        subscriber = _AsyncSubscriber(width, fps, self.buffer_size, loop)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.discard(subscriber)
+                self.dropped_closed += subscriber.dropped
+
+    def _encode(self, frame, width):
+        started = time.perf_counter()
+        height, frame_width = frame.shape[:2]
+        if width and width < frame_width:
+            size = (width, max(1, round(height * width / frame_width)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        data = _BOUNDARY + encode_jpeg(frame, self.quality) + b"\r\n"
+        self.frames_encoded += 1
+        self.encode_latency.observe(time.perf_counter() - started)
+        return data
+
+    # Dipanggil produsen untuk setiap frame kamera
+    def publish(self, frame):
+        self.frames_published += 1
+        now = time.monotonic()
+        with self._lock:
+            due = [sub for sub in self._subscribers if sub.due(now)]
+        encoded = {}  # lebar -> potongan multipart
+        for subscriber in due:
+            data = encoded.get(subscriber.width)
+            if data is None:
+                data = encoded[subscriber.width] = self._encode(frame, subscriber.width)
+            subscriber.push(data)
+
+    # Generator respons Flask untuk satu penonton
+    def frames(self, subscriber, timeout=5.0):
+        try:
+            while True:
+                data = subscriber.get(timeout)
+                if data is None:
+                    break  # Produsen berhenti mengirim frame
+                yield data
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "frames_published": self.frames_published,
+            "frames_encoded": self.frames_encoded,
+            "frames_sent": sum(sub.sent for sub in subscribers),
+            "frames_dropped": self.dropped_closed
+            + sum(sub.dropped for sub in subscribers),
+            "encode_latency": self.encode_latency.snapshot(),
+        }
+
+
+def _query_number(query, name, cast):
+    try:
+        return cast(query[name][0]) if name in query else None
+    except ValueError:
+        return None
+
+
+async def _handle_client(broadcaster, reader, writer, timeout):
+    request_line = await reader.readline()
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass  # Lewati header request
+
+    parts = request_line.decode(errors="ignore").split()
+    query = parse_qs(urlsplit(parts[1]).query) if len(parts) > 1 else {}
+    subscriber = broadcaster.subscribe_async(
+        width=_query_number(query, "width", int), fps=_query_number(query, "fps", float)
+    )
+    writer.write(
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: multipart/x-mixed-replace; boundary=frame\r\n"
+        b"Cache-Control: no-cache\r\n"
+        b"Connection: close\r\n\r\n"
+    )
+    try:
+        while True:
+            data = await subscriber.get(timeout)
+            if data is None:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        broadcaster.unsubscribe(subscriber)
+        writer.close()
+
+
+# Server MJPEG asyncio tanpa dependensi tambahan: satu event loop melayani
+# banyak penonton tanpa satu thread per koneksi. GET /?width=&fps=
+async def serve_async(broadcaster, host="0.0.0.0", port=8081, timeout=5.0):
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_client(broadcaster, reader, writer, timeout),
+        host,
+        port,
+    )
+    logger.info(f"Server MJPEG asyncio berjalan di http://{host}:{port}/")
+    async with server:
+        await server.serve_forever()
+
+
+# Jalankan serve_async di thread daemon dengan event loop sendiri
+def start_async_server(broadcaster, host="0.0.0.0", port=8081):
+    thread = threading.Thread(
+        target=asyncio.run,
+        args=(serve_async(broadcaster, host, port),),
+        name="mjpeg-async",
+        daemon=True,
+    )
+    thread.start()
+    return thread
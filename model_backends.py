@@ -0,0 +1,91 @@
+import logging
+import os
+import shutil
+from pathlib import Path
+
+logger = logging.getLogger()
+
+# Backend inferensi yang didukung. "pytorch" memakai best.pt apa adanya;
+# backend lain memakai hasil export ultralytics yang dimuat lagi dengan
+# YOLO(path), sehingga hasilnya tetap Results (boxes.cls, boxes.xyxy, names).
+BACKENDS = ("pytorch", "onnx", "openvino")
+
+# Backend default untuk model_registry, mis. MODEL_BACKEND=openvino MODEL_INT8=1
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "pytorch")
+MODEL_INT8 = os.getenv("MODEL_INT8", "0") == "1"
+# Dataset YAML kelas parkir (mobil/motor) untuk kalibrasi INT8 OpenVINO
+MODEL_INT8_DATA = os.getenv("MODEL_INT8_DATA")
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "model_cache")
+
+
+# Nama file/folder cache hasil export untuk kombinasi model dan backend
+def cached_path(model_path, backend, int8=False, imgsz=640, cache_dir=None):
+    stem = Path(model_path).stem
+    name = f"{stem}_{backend}{'_int8' if int8 else ''}_{imgsz}"
+    if backend == "onnx":
+        name += ".onnx"
+    else:
+        name += "_openvino_model"
+    return Path(cache_dir or MODEL_CACHE_DIR) / name
+
+
+def _is_fresh(exported, model_path):
+    return (
+        exported.exists()
+        and exported.stat().st_mtime >= Path(model_path).stat().st_mtime
+    )
+
+
+# INT8 untuk ONNX Runtime: kuantisasi dinamis bobot (tanpa data kalibrasi)
+def _quantize_onnx(source, target):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QUInt8)
+
+
+# Export model ke backend lalu simpan di cache. Export ulang hanya jika
+# best.pt lebih baru dari hasil cache. Mengembalikan path yang bisa dimuat
+# YOLO(path). INT8 OpenVINO memakai kalibrasi ultralytics dengan dataset
+# `data` (YAML) yang wajib diisi: tanpa itu ultralytics mengkalibrasi dengan
+# COCO, bukan gambar mobil/motor gerbang. INT8 ONNX memakai kuantisasi
+# dinamis onnxruntime.
+def export_model(model_path, backend, int8=False, imgsz=640, data=None, cache_dir=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend tidak dikenal: {backend}")
+    if backend == "openvino" and int8 and not data:
+        raise ValueError(
+            "INT8 OpenVINO membutuhkan dataset kalibrasi kelas parkir "
+            "(data=... / MODEL_INT8_DATA)"
+        )
+    if backend == "pytorch":
+        return str(model_path)
+
+    target = cached_path(model_path, backend, int8, imgsz, cache_dir)
+    if _is_fresh(target, model_path):
+        return str(target)
+
+    from ultralytics import YOLO
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Export {model_path} ke {backend}{' INT8' if int8 else ''}...")
+    model = YOLO(model_path)
+    if backend == "onnx":
+        # dynamic=True agar engine bisa mengirim batch beberapa kamera
+        exported = Path(model.export(format="onnx", imgsz=imgsz, dynamic=True))
+        if int8:
+            _quantize_onnx(exported, target)
+            exported.unlink()
+        else:
+            shutil.move(str(exported), target)
+    else:
+        exported = Path(
+            model.export(
+                format="openvino", imgsz=imgsz, dynamic=True, int8=int8, data=data
+            )
+        )
+        if target.exists():
+            shutil.rmtree(target)
+        shutil.move(str(exported), target)
+
+    logger.info(f"Model {backend} disimpan di {target}.")
+    return str(target)
@@ -0,0 +1,141 @@
+import logging
+import threading
+
+import numpy as np
+from ultralytics import YOLO
+
+from camera_source import open_camera
+from capture import MAX_FRAME_AGE, FrameGrabber
+from metrics import registry
+from model_backends import MODEL_BACKEND, MODEL_INT8, MODEL_INT8_DATA, export_model
+
+logger = logging.getLogger()
+
+
+# Model YOLO yang dipakai bersama. Inferensi dijaga lock karena objek
+# YOLO tidak aman dipanggil dari beberapa thread sekaligus. Untuk backend
+# selain pytorch, model di-export (dan di-cache) oleh model_backends.
+class SharedModel:
+    def __init__(self, model_path, backend="pytorch", int8=False, data=None):
+        self.model_path = model_path
+        self.backend = backend
+        self.int8 = int8
+        exported = export_model(
+            model_path, backend, int8, data=data or MODEL_INT8_DATA
+        )
+        self.model = YOLO(exported, task="detect")
+        self.names = self.model.names
+        self.lock = threading.Lock()
+        self.warmed_up = False
+
+    def __call__(self, source, **kwargs):
+        with self.lock:
+            return self.model(source, **kwargs)
+
+    # Jalankan satu inferensi dummy agar request pertama tidak menanggung
+    # biaya inisialisasi (alokasi memori, fuse layer, dll.)
+    def warmup(self, width=640, height=640):
+        dummy = np.zeros((height, width, 3), dtype=np.uint8)
+        self(dummy, verbose=False)
+        self.warmed_up = True
+        logger.info(f"Model {self.model_path} ({self.backend}) siap (warmup selesai).")
+        return self
+
+
+# Registry model per proses: setiap kombinasi path model dan backend hanya
+# dimuat sekali. Backend default diambil dari MODEL_BACKEND / MODEL_INT8.
+class ModelRegistry:
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_path="best.pt", warmup=True, backend=None, int8=None):
+        backend = backend or MODEL_BACKEND
+        int8 = MODEL_INT8 if int8 is None else int8
+        key = (model_path, backend, int8)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                logger.info(f"Memuat model {model_path} ({backend})...")
+                model = SharedModel(model_path, backend, int8)
+                if warmup:
+                    model.warmup()
+                self._models[key] = model
+            return model
+
+    def status(self):
+        with self._lock:
+            return {
+                f"{path}@{backend}{'-int8' if int8 else ''}": {
+                    "loaded": True,
+                    "backend": backend,
+                    "int8": int8,
+                    "warmed_up": model.warmed_up,
+                }
+                for (path, backend, int8), model in self._models.items()
+            }
+
+
+# Pool kamera per proses: satu koneksi (dan satu FrameGrabber) per sumber
+# video, dipakai bersama oleh semua request
+class CameraPool:
+    def __init__(self):
+        self._grabbers = {}
+        self._lock = threading.Lock()
+
+    # Mengembalikan grabber untuk sumber ini. Koneksi yang putus dibuka ulang
+    # sendiri oleh ResilientCapture; grabber yang sudah berhenti (mis. file
+    # habis) dibuat ulang.
+    def get(self, source):
+        with self._lock:
+            grabber = self._grabbers.get(source)
+            if grabber is not None and grabber.is_alive():
+                return grabber
+
+            cap = open_camera(source)
+            grabber = FrameGrabber(cap, name=str(source)).start()
+            registry.register("camera", grabber, camera=str(source))
+            self._grabbers[source] = grabber
+            return grabber
+
+    def status(self):
+        with self._lock:
+            return {
+                str(source): {"alive": grabber.is_alive(), **grabber.stats()}
+                for source, grabber in self._grabbers.items()
+            }
+
+    def release_all(self):
+        with self._lock:
+            for grabber in self._grabbers.values():
+                grabber.stop()
+            self._grabbers.clear()
+
+
+model_registry = ModelRegistry()
+camera_pool = CameraPool()
+
+
+# Kamera siap jika thread grabber berjalan, koneksinya tersambung (bukan
+# sedang backoff), dan frame terakhirnya masih segar
+def _camera_ready(camera):
+    age = camera.get("last_frame_age")
+    return (
+        camera["alive"]
+        and camera.get("connected", True)
+        and age is not None
+        and age <= MAX_FRAME_AGE
+    )
+
+
+# Status kesiapan untuk endpoint /ready
+def readiness():
+    models = model_registry.status()
+    cameras = camera_pool.status()
+    ready = (
+        bool(models)
+        and all(model["warmed_up"] for model in models.values())
+        and bool(cameras)
+        and all(_camera_ready(camera) for camera in cameras.values())
+    )
+    return {"ready": ready, "models": models, "cameras": cameras}
@@ -0,0 +1,91 @@
+from flask_sqlalchemy import SQLAlchemy
+from flask_marshmallow import Marshmallow
+from sqlalchemy import DDL, event
+from datetime import datetime
+
+# Inisialisasi SQLAlchemy dan Marshmallow bersama (panggil init_app di aplikasi)
+db = SQLAlchemy()
+ma = Marshmallow()
+
+
+# Satu kejadian deteksi (kendaraan terdeteksi, masuk, atau keluar). Dipakai
+# bersama oleh semua skrip gerbang; kolom yang tidak relevan dibiarkan NULL.
+# Tabel yang dibuat skrip versi lama harus dimigrasikan sebelum deploy:
+# python detection_maintenance.py migrate
+class Detection(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    detected_objects = db.Column(db.Text, nullable=False)
+    image_path = db.Column(db.String(255), nullable=True)
+    image_ref = db.Column(db.String(80), nullable=True)  # Referensi ke frame store
+    data = db.Column(db.LargeBinary, nullable=True)  # BLOB lama (migrate_blobs.py)
+
+    # Kolom khusus gerbang dengan OCR plat nomor
+    plate_image_ref = db.Column(db.String(80), nullable=True)
+    plate_image = db.Column(db.LargeBinary, nullable=True)  # BLOB lama plat nomor
+    plate_number = db.Column(db.String(20), nullable=True)  # Teks plat nomor
+    confidence_plate = db.Column(db.String(255), nullable=True)  # Keyakinan OCR
+    start_parking = db.Column(db.DateTime, nullable=True)
+    finish_parking = db.Column(db.DateTime, nullable=True)
+    total_time = db.Column(db.Integer, nullable=True)
+
+    # Indeks untuk API riwayat: rentang waktu (keyset timestamp, id), serta
+    # filter plat dan kelas yang selalu dikombinasikan dengan waktu
+    __table_args__ = (
+        db.Index("ix_detection_timestamp_id", "timestamp", "id"),
+        db.Index("ix_detection_plate_number_timestamp", "plate_number", "timestamp"),
+        db.Index("ix_detection_objects_timestamp", "detected_objects", "timestamp"),
+    )
+
+
+# Filter kelas memakai LIKE '%motor%' (detected_objects berisi "mobil, motor"),
+# jadi di PostgreSQL ditambah indeks trigram GIN
+DETECTION_TRGM_DDL = [
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_detection_objects_trgm "
+        "ON detection USING gin (detected_objects gin_trgm_ops)"
+    ),
+]
+for _ddl in DETECTION_TRGM_DDL:
+    event.listen(
+        Detection.__table__, "after_create", _ddl.execute_if(dialect="postgresql")
+    )
+
+
+# Sesi parkir: satu baris per kendaraan dari masuk sampai keluar
+class ParkingSession(db.Model):
+    __tablename__ = "parking_session"
+
+    id = db.Column(db.Integer, primary_key=True)
+    plate_number = db.Column(db.String(20), nullable=False)  # Plat ternormalisasi
+    confidence_plate = db.Column(db.String(255), nullable=True)
+    entry_image_ref = db.Column(db.String(80), nullable=True)
+    exit_image_ref = db.Column(db.String(80), nullable=True)
+    start_parking = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finish_parking = db.Column(db.DateTime, nullable=True)  # NULL = masih parkir
+    total_time = db.Column(db.Integer, nullable=True)  # Durasi parkir (detik)
+
+    __table_args__ = (
+        db.Index("ix_parking_session_plate_number", "plate_number"),
+        # Paling banyak satu sesi terbuka per plat; juga mempercepat pencarian
+        # sesi terbuka saat startup
+        db.Index(
+            "ux_parking_session_open_plate",
+            "plate_number",
+            unique=True,
+            postgresql_where=db.text("finish_parking IS NULL"),
+            sqlite_where=db.text("finish_parking IS NULL"),
+        ),
+    )
+
+
+# Rekap jumlah deteksi per menit/jam untuk dashboard. Kategori: "entries",
+# "exits", atau "class:<nama kelas>".
+class DetectionRollup(db.Model):
+    __tablename__ = "detection_rollup"
+
+    granularity = db.Column(db.String(8), primary_key=True)  # "minute" / "hour"
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    category = db.Column(db.String(32), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
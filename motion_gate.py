@@ -0,0 +1,93 @@
+import time
+
+import cv2
+import numpy as np
+
+
+# Pra-filter murah sebelum YOLO. Frame diperkecil, diubah ke grayscale, lalu
+# dibandingkan dengan latar belakang (rata-rata berjalan). YOLO hanya
+# dijalankan jika bagian ROI yang berubah melebihi threshold, atau jika
+# sudah lebih dari max_idle detik sejak inferensi terakhir (laju minimum).
+class MotionGate:
+    def __init__(
+        self,
+        roi=None,
+        threshold=0.01,
+        pixel_delta=25,
+        downscale_width=160,
+        learning_rate=0.05,
+        max_idle=5.0,
+    ):
+        self.roi = roi  # Poligon [(x, y), ...] dalam koordinat frame asli
+        self.threshold = threshold  # Porsi piksel ROI yang harus berubah (0-1)
+        self.pixel_delta = pixel_delta  # Selisih intensitas minimal per piksel
+        self.downscale_width = downscale_width
+        self.learning_rate = learning_rate
+        self.max_idle = max_idle  # None = tanpa laju minimum
+
+        self._background = None
+        self._mask = None
+        self._last_trigger = 0.0
+
+        # Statistik
+        self.frames_seen = 0
+        self.frames_skipped = 0
+        self.last_score = 0.0
+
+    def _prepare(self, frame):
+        height, width = frame.shape[:2]
+        scale = self.downscale_width / width
+        small = cv2.resize(
+            frame,
+            (self.downscale_width, max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0), scale
+
+    def _build_mask(self, shape, scale):
+        if self.roi is None:
+            return None
+        mask = np.zeros(shape, dtype=np.uint8)
+        polygon = (np.asarray(self.roi, dtype=np.float32) * scale).astype(np.int32)
+        cv2.fillPoly(mask, [polygon], 255)
+        return mask > 0
+
+    def should_infer(self, frame):
+        self.frames_seen += 1
+        gray, scale = self._prepare(frame)
+        now = time.monotonic()
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            self._mask = self._build_mask(gray.shape, scale)
+            self._last_trigger = now
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        changed = diff > self.pixel_delta
+        if self._mask is not None:
+            changed = changed[self._mask]
+        self.last_score = float(changed.mean()) if changed.size else 0.0
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+
+        idle_too_long = (
+            self.max_idle is not None and now - self._last_trigger >= self.max_idle
+        )
+        if self.last_score >= self.threshold or idle_too_long:
+            self._last_trigger = now
+            return True
+
+        self.frames_skipped += 1
+        return False
+
+    # Dapat dipakai langsung sebagai gate di BatchInferenceEngine
+    def __call__(self, captured):
+        return self.should_infer(captured.frame)
+
+    def stats(self):
+        return {
+            "frames_seen": self.frames_seen,
+            "frames_skipped": self.frames_skipped,
+            "last_score": self.last_score,
+        }
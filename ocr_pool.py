@@ -0,0 +1,123 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics import Histogram
+from plate_ocr import pad_to_same_size, preprocess_image
+
+logger = logging.getLogger()
+
+# easyocr.Reader milik proses worker (dibuat sekali oleh _init_worker)
+_reader = None
+
+
+def _init_worker(languages, gpu):
+    global _reader
+    import easyocr
+
+    _reader = easyocr.Reader(languages, gpu=gpu)
+
+
+# Dijalankan di proses worker: semua crop plat satu frame di-preprocess lalu
+# dibaca dalam satu panggilan readtext_batched. Kembalikan
+# [[(teks, confidence), ...] per crop] dan durasi
+def _readtext_batched(crops):
+    started = time.perf_counter()
+    images = pad_to_same_size([preprocess_image(crop) for crop in crops])
+    results = _reader.readtext_batched(images, batch_size=len(images))
+    elapsed = time.perf_counter() - started
+    readings = [
+        [(text, float(confidence)) for _, text, confidence in image_results]
+        for image_results in results
+    ]
+    return readings, elapsed
+
+
+# Pool proses untuk EasyOCR. Setiap worker memegang easyocr.Reader sendiri,
+# sehingga loop gerbang tidak pernah menunggu OCR. Jumlah job yang menunggu
+# dibatasi max_pending; job di atas batas itu ditolak (submit -> None).
+class OcrWorkerPool:
+    def __init__(
+        self,
+        languages=("en", "id"),
+        workers=2,
+        max_pending=8,
+        timeout=5.0,
+        gpu=False,
+    ):
+        self.timeout = timeout  # Batas waktu satu job (detik)
+        self.max_pending = max_pending
+        # "spawn" agar worker tidak mewarisi state torch/OpenMP dari proses utama
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(list(languages), gpu),
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        # Statistik dan histogram latensi per tahap (detik)
+        self.submitted = 0
+        self.images = 0  # Jumlah crop di semua job
+        self.rejected = 0
+        self.failed = 0
+        self.latency = {
+            "queue": Histogram(),  # Menunggu worker kosong
+            "ocr": Histogram(),  # Preprocess + readtext_batched di worker
+            "total": Histogram(),  # Dari submit sampai hasil tersedia
+        }
+
+    def available(self):
+        with self._lock:
+            return self.max_pending - self._pending
+
+    # Kirim crop plat (BGR, belum di-preprocess) sebagai satu job batch.
+    # Mengembalikan Future berisi [[(teks, confidence), ...] per crop] atau
+    # None jika penuh.
+    def submit(self, crops):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                return None
+            self._pending += 1
+            self.submitted += 1
+            self.images += len(crops)
+
+        submitted_at = time.monotonic()
+        future = self._executor.submit(_readtext_batched, list(crops))
+        future.add_done_callback(lambda f: self._on_done(f, submitted_at))
+        return future
+
+    def _on_done(self, future, submitted_at):
+        with self._lock:
+            self._pending -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.failed += 1
+            logger.error(f"OCR worker gagal: {future.exception()}")
+            return
+        total = time.monotonic() - submitted_at
+        _, ocr_time = future.result()
+        self.latency["total"].observe(total)
+        self.latency["ocr"].observe(ocr_time)
+        self.latency["queue"].observe(max(0.0, total - ocr_time))
+
+    def stats(self):
+        return {
+            "pending": self.max_pending - self.available(),
+            "submitted": self.submitted,
+            "images": self.images,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "latency": {
+                stage: histogram.snapshot()
+                for stage, histogram in self.latency.items()
+            },
+        }
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,160 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import Integer, cast, func
+
+from models import db, ParkingSession
+from plate_ocr import normalize_plate
+
+logger = logging.getLogger()
+
+
+# Jarak edit (Levenshtein) antara dua string
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+# Varian hapus-satu-karakter (termasuk string aslinya). Dua plat dengan jarak
+# edit <= 1 selalu berbagi minimal satu varian.
+def _deletion_variants(plate):
+    return {plate} | {plate[:i] + plate[i + 1 :] for i in range(len(plate))}
+
+
+# Ekspresi SQL durasi (detik) dari start_parking sampai finish
+def _elapsed_seconds(finish):
+    if db.engine.dialect.name == "sqlite":
+        days = func.julianday(finish) - func.julianday(ParkingSession.start_parking)
+        return cast(days * 86400, Integer)
+    return cast(func.extract("epoch", finish - ParkingSession.start_parking), Integer)
+
+
+# Indeks sesi parkir yang masih terbuka. Pencarian plat persis O(1) lewat
+# dict; plat hasil OCR yang meleset satu karakter dicocokkan lewat indeks
+# varian hapus-satu-karakter. Semua perubahan langsung ditulis ke tabel
+# parking_session, dan sesi terbuka dimuat ulang saat startup.
+# Harus dipanggil di dalam app context. Aman dipakai bersama oleh beberapa
+# thread (mis. tahap gerbang masuk dan keluar).
+class ParkingSessionStore:
+    def __init__(self, fuzzy=True):
+        self.fuzzy = fuzzy  # Cocokkan plat dengan jarak edit 1
+        self._lock = threading.RLock()
+        self._open = {}  # plat -> (id sesi, start_parking)
+        self._variants = defaultdict(set)  # varian -> {plat}
+
+    def _index(self, plate, session_id, start):
+        self._open[plate] = (session_id, start)
+        for variant in _deletion_variants(plate):
+            self._variants[variant].add(plate)
+
+    def _unindex(self, plate):
+        self._open.pop(plate, None)
+        for variant in _deletion_variants(plate):
+            plates = self._variants.get(variant)
+            if plates is not None:
+                plates.discard(plate)
+                if not plates:
+                    del self._variants[variant]
+
+    # Muat semua sesi yang belum selesai dari database
+    def load(self):
+        sessions = ParkingSession.query.filter(
+            ParkingSession.finish_parking.is_(None)
+        ).all()
+        with self._lock:
+            self._open.clear()
+            self._variants.clear()
+            for session in sessions:
+                self._index(session.plate_number, session.id, session.start_parking)
+        logger.info(f"{len(sessions)} sesi parkir terbuka dimuat.")
+        return self
+
+    # Cari plat sesi terbuka yang cocok; None jika tidak ada atau ambigu
+    def find(self, plate):
+        plate = normalize_plate(plate)
+        with self._lock:
+            return self._find(plate)
+
+    def _find(self, plate):
+        if plate in self._open:
+            return plate
+        if not self.fuzzy:
+            return None
+
+        candidates = set()
+        for variant in _deletion_variants(plate):
+            candidates |= self._variants.get(variant, set())
+        matches = [
+            candidate
+            for candidate in candidates
+            if edit_distance(plate, candidate) <= 1
+        ]
+        if len(matches) == 1:
+            return matches[0]
+        return None
+
+    def is_open(self, plate):
+        return self.find(plate) is not None
+
+    # Buka sesi baru. Mengembalikan ParkingSession, atau None jika plat
+    # (atau plat yang mirip) masih punya sesi terbuka.
+    def open(self, plate, start=None, **values):
+        plate = normalize_plate(plate)
+        with self._lock:
+            if not plate or self._find(plate) is not None:
+                return None
+
+            session = ParkingSession(
+                plate_number=plate, start_parking=start or datetime.utcnow(), **values
+            )
+            db.session.add(session)
+            db.session.commit()
+            self._index(plate, session.id, session.start_parking)
+            return session
+
+    # Tutup sesi plat dengan satu UPDATE yang sekaligus menghitung total_time.
+    # Mengembalikan ParkingSession yang sudah ditutup, atau None.
+    def close(self, plate, finish=None, **values):
+        with self._lock:
+            matched = self.find(plate)
+            if matched is None:
+                return None
+            session_id, _ = self._open[matched]
+            self._unindex(matched)
+
+        finish = finish or datetime.utcnow()
+        updated = (
+            ParkingSession.query.filter(
+                ParkingSession.id == session_id,
+                ParkingSession.finish_parking.is_(None),
+            ).update(
+                {
+                    ParkingSession.finish_parking: finish,
+                    ParkingSession.total_time: _elapsed_seconds(finish),
+                    **{getattr(ParkingSession, key): v for key, v in values.items()},
+                },
+                synchronize_session=False,
+            )
+        )
+        db.session.commit()
+
+        if updated != 1:
+            logger.warning(f"Sesi {matched} sudah ditutup oleh proses lain.")
+            return None
+        return db.session.get(ParkingSession, session_id)
+
+    def __len__(self):
+        return len(self._open)
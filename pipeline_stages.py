@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+
+from metrics import Histogram
+
+logger = logging.getLogger()
+
+# Cara menjalankan handler gerbang setelah inferensi:
+# - "inline": langsung di thread engine inferensi (perilaku skrip lama)
+# - "threads": satu thread per gerbang dengan antrean terbatas
+# - "asyncio": semua gerbang bergantian di satu event loop
+# Mode "processes" (gerbang dibagi ke beberapa proses) diatur gate_service.
+STAGE_MODES = ("inline", "threads", "asyncio")
+
+_STOP = object()
+
+
+# Tahap handler di thread sendiri. Engine inferensi cukup memasukkan
+# (captured, result) ke antrean, sehingga gerbang yang lambat (menyimpan
+# gambar, OCR) tidak menahan batch YOLO untuk gerbang lain. Frame tanpa hasil
+# deteksi dibuang jika antrean penuh; frame dengan hasil deteksi menunggu
+# (backpressure) agar tidak ada kendaraan yang terlewat.
+class ThreadStage:
+    def __init__(self, name, handler, max_queue=4):
+        self.name = name
+        self.handler = handler
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+
+        # Statistik
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.queue_latency = Histogram()  # Masuk antrean sampai diproses
+        self.handler_latency = Histogram()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"stage-{self.name}", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def __call__(self, captured, result):
+        item = (captured, result, time.monotonic())
+        if result is not None:
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            captured, result, queued_at = item
+            started = time.monotonic()
+            self.queue_latency.observe(started - queued_at)
+            try:
+                self.handler(captured, result)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Tahap {self.name} gagal: {e}")
+            self.handler_latency.observe(time.monotonic() - started)
+
+    # Proses sisa antrean lalu hentikan thread
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self):
+        return {
+            "mode": "threads",
+            "queue_depth": self._queue.qsize(),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queue_latency": self.queue_latency.snapshot(),
+            "handler_latency": self.handler_latency.snapshot(),
+        }
+
+
+# Satu event loop asyncio di thread daemon, dipakai bersama oleh semua
+# AsyncioStage
+class AsyncioLoop:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self.loop.run_forever, name="stage-asyncio", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+# Tahap handler di event loop bersama. Handler gerbang dijalankan bergantian
+# di satu thread (urutan frame per gerbang tetap terjaga), cocok untuk banyak
+# gerbang ringan. Jumlah frame yang menunggu per gerbang dibatasi max_pending;
+# frame tanpa hasil deteksi di atas batas itu dibuang.
+class AsyncioStage:
+    def __init__(self, name, handler, runner, max_pending=4):
+        self.name = name
+        self.handler = handler
+        self.runner = runner  # AsyncioLoop
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        # Statistik
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.queue_latency = Histogram()
+        self.handler_latency = Histogram()
+
+    def start(self):
+        self.runner.start()
+        return self
+
+    def __call__(self, captured, result):
+        with self._lock:
+            if result is None and self._pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending += 1
+        self.runner.loop.call_soon_threadsafe(
+            self._handle, captured, result, time.monotonic()
+        )
+
+    def _handle(self, captured, result, queued_at):
+        started = time.monotonic()
+        self.queue_latency.observe(started - queued_at)
+        try:
+            self.handler(captured, result)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Tahap {self.name} gagal: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+        self.handler_latency.observe(time.monotonic() - started)
+
+    def stop(self):
+        pass  # Event loop dihentikan oleh pemiliknya (AsyncioLoop.stop)
+
+    def stats(self):
+        return {
+            "mode": "asyncio",
+            "queue_depth": self._pending,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queue_latency": self.queue_latency.snapshot(),
+            "handler_latency": self.handler_latency.snapshot(),
+        }
+
+
+# Bungkus handler sesuai mode. Mode "inline" mengembalikan handler apa adanya.
+def make_stage(mode, name, handler, runner=None, max_queue=4):
+    if mode == "inline":
+        return handler
+    if mode == "threads":
+        return ThreadStage(name, handler, max_queue=max_queue).start()
+    if mode == "asyncio":
+        return AsyncioStage(name, handler, runner, max_pending=max_queue).start()
+    raise ValueError(f"Mode tahap tidak dikenal: {mode} (pilih {STAGE_MODES})")
@@ -0,0 +1,330 @@
+import heapq
+import itertools
+import re
+import time
+from collections import OrderedDict, defaultdict
+
+import cv2
+import numpy as np
+
+
+# Fungsi Pre-Processing untuk OCR
+def preprocess_image(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    enhanced = clahe.apply(gray)
+    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    denoised = cv2.GaussianBlur(binary, (5, 5), 0)
+    resized = cv2.resize(denoised, None, fx=2, fy=2, interpolation=cv2.INTER_LINEAR)
+    padded = cv2.copyMakeBorder(
+        resized, 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=[255, 255, 255]
+    )
+    return padded
+
+
+# Samakan ukuran gambar hasil preprocess dengan padding putih di kanan/bawah
+# (tanpa mengubah rasio), agar bisa dibaca sebagai satu batch
+def pad_to_same_size(images, value=255):
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    return [
+        cv2.copyMakeBorder(
+            image,
+            0,
+            height - image.shape[0],
+            0,
+            width - image.shape[1],
+            cv2.BORDER_CONSTANT,
+            value=value,
+        )
+        for image in images
+    ]
+
+
+# Plat dinormalisasi: huruf besar, hanya huruf dan angka ("b 1234 xy" -> "B1234XY")
+def normalize_plate(text):
+    return re.sub(r"[^A-Z0-9]", "", text.upper())
+
+
+# Ketajaman crop (variansi Laplacian); crop buram bernilai kecil
+def sharpness(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+# Perceptual hash (dHash 64-bit) untuk mengenali crop yang hampir identik
+def dhash(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+# Gabungkan potongan teks satu crop [(teks, confidence), ...] menjadi satu
+# kandidat plat (teks ternormalisasi, confidence rata-rata)
+def combine_readings(readings):
+    if not readings:
+        return "", 0.0
+    text = normalize_plate(" ".join([text for text, _ in readings]))
+    return text, float(np.mean([confidence for _, confidence in readings]))
+
+
+# Gabungkan beberapa hasil OCR [(teks, confidence), ...] dengan voting per
+# karakter yang dibobot confidence. Panjang plat dipilih dulu berdasarkan
+# total bobot, lalu setiap posisi diisi karakter dengan bobot terbesar.
+def vote_plate(candidates):
+    by_length = defaultdict(list)
+    for text, confidence in candidates:
+        if text:
+            by_length[len(text)].append((text, confidence))
+    if not by_length:
+        return None, 0.0
+
+    length, group = max(
+        by_length.items(), key=lambda item: sum(conf for _, conf in item[1])
+    )
+    total_weight = sum(conf for _, conf in group) or 1e-9
+
+    characters = []
+    agreement = []
+    for position in range(length):
+        weights = defaultdict(float)
+        for text, confidence in group:
+            weights[text[position]] += confidence
+        character, weight = max(weights.items(), key=lambda item: item[1])
+        characters.append(character)
+        agreement.append(weight / total_weight)
+
+    mean_confidence = total_weight / len(group)
+    return "".join(characters), float(np.mean(agreement) * mean_confidence)
+
+
+# Job OCR asinkron untuk satu kendaraan
+class _OcrJob:
+    def __init__(self, context, candidates, futures):
+        self.context = context  # Data milik pemanggil, dikembalikan oleh poll()
+        self.candidates = candidates  # Hasil yang sudah ada di cache
+        self.futures = futures  # [(kunci cache, Future batch, indeks crop), ...]
+        self.started = time.monotonic()
+
+
+# Pipeline OCR per kendaraan (track). Crop dikumpulkan dari beberapa frame,
+# hanya crop paling tajam yang di-OCR, lalu hasilnya digabung dengan voting.
+# Hasil OCR per crop di-cache berdasarkan (track_id, perceptual hash), jadi
+# hanya crop kendaraan yang sama yang bisa memakai ulang hasilnya; kendaraan
+# lain yang mirip (mis. motor sejenis di posisi berhenti yang sama) tidak
+# pernah mendapat plat dari cache. Cache track dibuang oleh prune().
+#
+# Crop dari semua kendaraan yang siap dibaca dalam satu frame dibaca
+# bersama dalam satu batch (readtext_batched), satu plat per kendaraan.
+#
+# Mode sinkron memakai easyocr.Reader langsung (recognize_batch). Jika pool
+# (OcrWorkerPool) diberikan, OCR dijalankan di proses worker lewat
+# recognize_batch_async() dan hasilnya diambil dengan poll() tanpa menunggu.
+class PlateOcrPipeline:
+    def __init__(
+        self,
+        reader=None,
+        pool=None,
+        crops_per_plate=3,
+        max_wait_hits=10,
+        cache_size=512,
+    ):
+        self.reader = reader  # easyocr.Reader
+        self.pool = pool  # OcrWorkerPool
+        self.crops_per_plate = crops_per_plate
+        self.max_wait_hits = max_wait_hits  # Baca walau crop belum lengkap
+        self.cache_size = cache_size
+        self._crops = defaultdict(list)  # track_id -> heap (ketajaman, no, crop)
+        self._order = itertools.count()
+        self._cache = OrderedDict()
+        self._jobs = []
+
+        # Statistik
+        self.ocr_calls = 0  # Jumlah crop yang di-OCR
+        self.ocr_batches = 0
+        self.cache_hits = 0
+        self.timeouts = 0
+
+    # Simpan crop kendaraan; hanya crops_per_plate crop tertajam yang disimpan
+    def add_crop(self, track_id, crop):
+        if crop.size == 0:
+            return
+        heap = self._crops[track_id]
+        item = (sharpness(crop), next(self._order), crop)
+        if len(heap) < self.crops_per_plate:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heappushpop(heap, item)
+
+    # Apakah crop untuk track ini sudah cukup untuk dibaca
+    def ready(self, track):
+        count = len(self._crops.get(track.id, ()))
+        return count >= self.crops_per_plate or (
+            count > 0 and track.hits >= self.max_wait_hits
+        )
+
+    def _cache_get(self, key):
+        if key is None:
+            return None
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+        return cached
+
+    def _cache_put(self, key, value):
+        if key is None:
+            return
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # Pisahkan crop milik beberapa track menjadi hasil cache dan crop yang
+    # perlu di-OCR. Crop identik (hash sama) dari track yang sama hanya
+    # di-OCR sekali. Mengembalikan ({track_id: [kandidat dari cache]},
+    # {track_id: [(kunci, indeks crop)]}, [(kunci, crop) untuk di-OCR]).
+    def _split_cached(self, track_ids):
+        cached = {}
+        uncached = {}
+        to_read = {}
+        for track_id in track_ids:
+            cached[track_id] = []
+            uncached[track_id] = []
+            for _, _, crop in self._crops.get(track_id, []):
+                key = (track_id, dhash(crop))
+                value = self._cache_get(key)
+                if value is not None:
+                    cached[track_id].append(value)
+                    continue
+                if key not in to_read:
+                    to_read[key] = (len(to_read), crop)
+                uncached[track_id].append((key, to_read[key][0]))
+        return cached, uncached, [(key, crop) for key, (_, crop) in to_read.items()]
+
+    # OCR beberapa crop dalam satu batch; mengembalikan [(teks, confidence),
+    # ...] sesuai urutan crop. Cache hanya dipakai jika track_ids (track
+    # pemilik tiap crop) diberikan.
+    def ocr_crops(self, crops, track_ids=None):
+        if track_ids is None:
+            keys = [None] * len(crops)
+        else:
+            keys = [
+                (track_id, dhash(crop)) for track_id, crop in zip(track_ids, crops)
+            ]
+        values = [self._cache_get(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            self.ocr_calls += len(missing)
+            self.ocr_batches += 1
+            images = pad_to_same_size(
+                [preprocess_image(crops[index]) for index in missing]
+            )
+            results = self.reader.readtext_batched(images, batch_size=len(images))
+            for index, image_results in zip(missing, results):
+                values[index] = combine_readings(
+                    [(res[1], res[2]) for res in image_results]
+                )
+                self._cache_put(keys[index], values[index])
+        return values
+
+    # OCR satu crop; mengembalikan (teks, confidence)
+    def ocr_crop(self, crop, track_id=None):
+        track_ids = None if track_id is None else [track_id]
+        return self.ocr_crops([crop], track_ids)[0]
+
+    # Baca plat beberapa track sekaligus (semua crop dalam satu batch) lalu
+    # kosongkan crop track tersebut. Mengembalikan {track_id: (teks,
+    # confidence) atau None jika tidak terbaca}.
+    def recognize_batch(self, track_ids):
+        heaps = {track_id: self._crops.pop(track_id, []) for track_id in track_ids}
+        crops = [crop for heap in heaps.values() for _, _, crop in heap]
+        owners = [track_id for track_id, heap in heaps.items() for _ in heap]
+        values = iter(self.ocr_crops(crops, owners) if crops else [])
+
+        plates = {}
+        for track_id, heap in heaps.items():
+            text, confidence = vote_plate([next(values) for _ in heap])
+            plates[track_id] = (text, confidence) if text else None
+        return plates
+
+    # Baca plat dari crop terbaik lalu kosongkan crop track tersebut.
+    # Mengembalikan (teks, confidence) atau None jika tidak terbaca.
+    def recognize(self, track_id):
+        return self.recognize_batch([track_id])[track_id]
+
+    # Kirim crop terbaik beberapa track (items = [(track_id, context), ...])
+    # ke pool OCR sebagai satu job batch. Mengembalikan False jika pool sedang
+    # penuh; crop tetap disimpan dan bisa dicoba lagi nanti.
+    def recognize_batch_async(self, items):
+        items = list(items)
+        cached, uncached, to_read = self._split_cached(
+            [track_id for track_id, _ in items]
+        )
+
+        future = None
+        if to_read:
+            future = self.pool.submit([crop for _, crop in to_read])
+            if future is None:
+                return False
+            self.ocr_calls += len(to_read)
+            self.ocr_batches += 1
+
+        for track_id, context in items:
+            futures = [(key, future, index) for key, index in uncached[track_id]]
+            self._crops.pop(track_id, None)
+            self._jobs.append(_OcrJob(context, cached[track_id], futures))
+        return True
+
+    # Kirim crop terbaik satu track ke pool OCR (lihat recognize_batch_async)
+    def recognize_async(self, track_id, context):
+        return self.recognize_batch_async([(track_id, context)])
+
+    # Ambil job yang sudah selesai (atau melewati timeout pool).
+    # Mengembalikan [(context, (teks, confidence) atau None), ...].
+    def poll(self):
+        finished = []
+        remaining = []
+        now = time.monotonic()
+        for job in self._jobs:
+            timed_out = now - job.started > self.pool.timeout
+            if not timed_out and not all(f.done() for _, f, _ in job.futures):
+                remaining.append(job)
+                continue
+
+            candidates = list(job.candidates)
+            for key, future, index in job.futures:
+                if future.done() and not future.cancelled() and not future.exception():
+                    readings, _ = future.result()
+                    value = combine_readings(readings[index])
+                    self._cache_put(key, value)
+                    candidates.append(value)
+                else:
+                    future.cancel()
+            if timed_out:
+                self.timeouts += 1
+
+            text, confidence = vote_plate(candidates)
+            finished.append((job.context, (text, confidence) if text else None))
+
+        self._jobs = remaining
+        return finished
+
+    # Buang crop dan cache OCR milik track yang sudah tidak aktif
+    def prune(self, active_ids):
+        active_ids = set(active_ids)
+        for track_id in list(self._crops):
+            if track_id not in active_ids:
+                del self._crops[track_id]
+        for key in list(self._cache):
+            if key[0] not in active_ids:
+                del self._cache[key]
+
+    def stats(self):
+        return {
+            "ocr_calls": self.ocr_calls,
+            "ocr_batches": self.ocr_batches,
+            "cache_hits": self.cache_hits,
+            "timeouts": self.timeouts,
+            "pending_jobs": len(self._jobs),
+        }
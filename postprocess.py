@@ -0,0 +1,121 @@
+import numpy as np
+
+from tracker import iou_matrix
+
+# Kelas kendaraan yang dicatat oleh semua gerbang
+VEHICLE_CLASSES = ("mobil", "motor")
+
+# Batas confidence minimum (sama dengan bawaan YOLO)
+MIN_CONFIDENCE = 0.25
+
+
+# Hasil deteksi satu frame sebagai array NumPy: xyxy (N x 4), conf (N), cls
+# (N). Semua operasi (filter kelas, confidence, NMS, crop) bekerja pada
+# seluruh array sekaligus, bukan per box di Python.
+class Detections:
+    def __init__(self, xyxy, conf, cls, names):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls).astype(np.int64).reshape(-1)
+        self.names = names  # {id kelas: nama kelas}
+
+    # Ambil box dari hasil YOLO (results[0]) dengan satu salinan ke CPU
+    @classmethod
+    def from_result(cls, result, names=None):
+        data = result.boxes.data.cpu().numpy()  # [x1, y1, x2, y2, (id), conf, cls]
+        return cls(data[:, :4], data[:, -2], data[:, -1], names or result.names)
+
+    def __len__(self):
+        return len(self.cls)
+
+    # Subset berdasarkan mask boolean atau array indeks
+    def select(self, index):
+        return Detections(
+            self.xyxy[index], self.conf[index], self.cls[index], self.names
+        )
+
+    # ID kelas dari daftar nama kelas (nama yang tidak dikenal diabaikan)
+    def class_ids(self, class_names):
+        wanted = set(class_names)
+        return [class_id for class_id, name in self.names.items() if name in wanted]
+
+    # Saring berdasarkan kelas (ID atau nama) dan confidence minimum
+    def filter(self, classes=None, min_conf=MIN_CONFIDENCE):
+        mask = self.conf >= min_conf
+        if classes is not None:
+            classes = list(classes)
+            if classes and isinstance(classes[0], str):
+                classes = self.class_ids(classes)
+            mask &= np.isin(self.cls, classes)
+        return self.select(mask)
+
+    # Nama kelas setiap box, berurutan
+    def labels(self):
+        if not len(self):
+            return []
+        lookup = np.array(
+            [self.names.get(i, str(i)) for i in range(int(self.cls.max()) + 1)]
+        )
+        return lookup[self.cls].tolist()
+
+    # Geser box dari koordinat crop/tile ke koordinat frame asli
+    def shifted(self, offset):
+        x0, y0 = offset
+        shift = np.array([x0, y0, x0, y0], dtype=np.float32)
+        return Detections(self.xyxy + shift, self.conf, self.cls, self.names)
+
+    # NMS per kelas; mengembalikan Detections yang tersisa (urut confidence)
+    def nms(self, iou_threshold=0.5):
+        return self.select(nms(self.xyxy, self.conf, iou_threshold, self.cls))
+
+    # Potongan frame untuk setiap box
+    def crops(self, frame, pad=0):
+        return crop_boxes(frame, self.xyxy, pad)
+
+
+# Non-maximum suppression greedy. Jika cls diberikan, box dari kelas berbeda
+# tidak saling menekan (box digeser per kelas agar tidak pernah tumpang
+# tindih). Mengembalikan indeks box yang dipertahankan, urut confidence.
+def nms(xyxy, conf, iou_threshold=0.5, cls=None):
+    xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+    if not len(xyxy):
+        return np.zeros(0, dtype=np.int64)
+    if cls is not None:
+        offset = np.asarray(cls, dtype=np.float32).reshape(-1, 1)
+        xyxy = xyxy + offset * (xyxy.max() + 1)
+
+    order = np.argsort(-np.asarray(conf), kind="stable")
+    ious = iou_matrix(xyxy[order], xyxy[order])
+    suppressed = np.zeros(len(order), dtype=bool)
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        suppressed[i + 1 :] |= ious[i, i + 1 :] > iou_threshold
+    return order[~suppressed]
+
+
+# Gabungkan deteksi dari beberapa tile/ROI yang saling tumpang tindih:
+# parts = [(Detections, (x0, y0)), ...]. Box digeser ke koordinat frame lalu
+# duplikat di area tumpang tindih dibuang dengan NMS per kelas.
+def merge_tiles(parts, iou_threshold=0.5):
+    parts = list(parts)
+    if not parts:
+        raise ValueError("merge_tiles membutuhkan minimal satu tile")
+    shifted = [detections.shifted(offset) for detections, offset in parts]
+    merged = Detections(
+        np.concatenate([d.xyxy for d in shifted]),
+        np.concatenate([d.conf for d in shifted]),
+        np.concatenate([d.cls for d in shifted]),
+        shifted[0].names,
+    )
+    return merged.nms(iou_threshold)
+
+
+# Potong frame untuk setiap box xyxy (N x 4). Koordinat dijadikan bilangan bulat
+# dan dijepit ke ukuran frame sekaligus; hasilnya view (tanpa salinan).
+def crop_boxes(frame, xyxy, pad=0):
+    height, width = frame.shape[:2]
+    boxes = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+    boxes = boxes + np.array([-pad, -pad, pad, pad], dtype=np.float32)
+    boxes = np.clip(boxes, 0, [width, height, width, height]).astype(np.int32)
+    return [frame[y0:y1, x0:x1] for x0, y0, x1, y1 in boxes.tolist()]
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from flask import Blueprint, Response, jsonify
+
+from frame_encoding import encode_jpeg
+from metrics import registry
+
+
+# Pratinjau kamera berkecepatan rendah untuk mode headless (pengganti
+# cv2.imshow). Handler cukup memanggil update() dengan frame dan hasil YOLO;
+# kotak deteksi baru digambar (result.plot) dan di-encode saat ada yang
+# membuka /preview, paling banyak max_fps kali per detik.
+class FramePreview:
+    def __init__(self, max_fps=1.0, quality=70):
+        self.interval = 1.0 / max_fps
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._frame = None
+        self._result = None
+        self._seq = 0
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self._jpeg_at = 0.0
+
+    # Simpan frame terbaru (hanya referensi, tanpa menggambar atau encode)
+    def update(self, frame, result=None):
+        with self._lock:
+            self._frame = frame
+            self._result = result
+            self._seq += 1
+
+    # JPEG beranotasi terbaru, atau None jika belum ada frame
+    def jpeg(self):
+        with self._lock:
+            fresh = time.monotonic() - self._jpeg_at < self.interval
+            if self._jpeg is not None and (fresh or self._jpeg_seq == self._seq):
+                return self._jpeg
+            frame, result, seq = self._frame, self._result, self._seq
+        if frame is None:
+            return None
+
+        if result is not None:
+            with registry.stage("plot"):
+                frame = result.plot()
+        data = encode_jpeg(frame, self.quality)
+        with self._lock:
+            self._jpeg, self._jpeg_seq, self._jpeg_at = data, seq, time.monotonic()
+        return data
+
+    # Stream MJPEG dengan laju max_fps
+    def stream(self):
+        while True:
+            data = self.jpeg()
+            if data is not None:
+                yield b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + data + b"\r\n"
+            time.sleep(self.interval)
+
+
+# Blueprint GET /preview (MJPEG) dan GET /preview.jpg (satu gambar).
+# Beberapa gerbang dalam satu proses memakai name dan url_prefix berbeda.
+def preview_blueprint(preview, name="preview", url_prefix=None):
+    blueprint = Blueprint(name, __name__, url_prefix=url_prefix)
+
+    @blueprint.route("/preview.jpg", methods=["GET"])
+    def preview_image():
+        data = preview.jpeg()
+        if data is None:
+            return jsonify({"error": "Belum ada frame"}), 503
+        return Response(data, mimetype="image/jpeg")
+
+    @blueprint.route("/preview", methods=["GET"])
+    def preview_stream():
+        return Response(
+            preview.stream(), mimetype="multipart/x-mixed-replace; boundary=frame"
+        )
+
+    return blueprint
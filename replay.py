@@ -0,0 +1,407 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import resource
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import cv2
+from flask import Flask
+from sqlalchemy import func
+
+from aggregates import OccupancyAggregator
+from capture import CapturedFrame, FrameGrabber
+from detection_writer import DetectionWriter
+from frame_store import LocalFrameStore
+from gate_commands import GateCommandDispatcher
+from model_registry import model_registry
+from models import db, Detection
+from roi import get_roi
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+logger = logging.getLogger()
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+# Pengganti cv2.VideoCapture untuk rekaman: file video atau folder gambar
+# (diurutkan menurut nama). Dengan realtime=True frame diberikan sesuai fps
+# rekaman seperti kamera sungguhan; tanpa itu secepat mungkin.
+class ReplayCapture:
+    def __init__(self, source, fps=None, realtime=True):
+        self.source = str(source)
+        self.realtime = realtime
+        if os.path.isdir(self.source):
+            self._images = sorted(
+                path
+                for path in Path(self.source).iterdir()
+                if path.suffix.lower() in IMAGE_EXTENSIONS
+            )
+            self._cap = None
+            self.fps = fps or 10.0
+        else:
+            self._images = None
+            self._cap = cv2.VideoCapture(self.source)
+            self.fps = fps or self._cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.frames_read = 0
+        self._started = None
+
+    def isOpened(self):
+        if self._images is not None:
+            return bool(self._images)
+        return self._cap.isOpened()
+
+    def read(self):
+        if self.realtime:
+            if self._started is None:
+                self._started = time.monotonic()
+            delay = self._started + self.frames_read / self.fps - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        if self._images is not None:
+            if self.frames_read >= len(self._images):
+                return False, None
+            frame = cv2.imread(str(self._images[self.frames_read]))
+            ret = frame is not None
+        else:
+            ret, frame = self._cap.read()
+        if ret:
+            self.frames_read += 1
+        return ret, frame
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self._cap.get(prop) if self._cap is not None else 0.0
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+
+
+# Grabber untuk mode secepat mungkin: frame dibaca saat engine memintanya,
+# sehingga tidak ada frame yang dibuang dan hasilnya bisa dibandingkan antar
+# commit. Mode realtime memakai FrameGrabber biasa (drop-oldest).
+class ReplayGrabber(FrameGrabber):
+    def start(self):
+        self._running = True
+        return self
+
+    def read(self, after_seq=None, timeout=None):
+        if not self._running:
+            return None
+        started = time.monotonic()
+        ret, frame = self.cap.read()
+        now = time.monotonic()
+        if not ret:
+            self._running = False
+            return None
+        self.decode_latency.observe(now - started)
+        self._seq += 1
+        self._taken_seq = self._seq
+        self.frames_captured += 1
+        return CapturedFrame(frame, now, self._seq)
+
+
+# Cocokkan topik MQTT dengan filter langganan (+ dan #)
+def topic_matches(pattern, topic):
+    pattern_parts = pattern.split("/")
+    topic_parts = topic.split("/")
+    for index, part in enumerate(pattern_parts):
+        if part == "#":
+            return True
+        if index >= len(topic_parts) or part not in ("+", topic_parts[index]):
+            return False
+    return len(pattern_parts) == len(topic_parts)
+
+
+class _MessageInfo:
+    def __init__(self, mid):
+        self.mid = mid
+        self.rc = 0
+
+
+class _Message:
+    def __init__(self, topic, payload, qos):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+
+
+# Broker MQTT di dalam proses: menggantikan Mosquitto saat replay. Semua
+# pesan dicatat, diteruskan ke klien yang berlangganan, dan di-ack setelah
+# ack_delay detik (mensimulasikan round-trip jaringan).
+class InProcessBroker:
+    def __init__(self, ack_delay=0.0):
+        self.ack_delay = ack_delay
+        self.messages = []  # [(topik, payload)]
+        self._subscriptions = []  # [(filter, klien)]
+        self._lock = threading.Lock()
+
+    def client(self):
+        return InProcessMqttClient(self)
+
+    def _subscribe(self, pattern, client):
+        with self._lock:
+            self._subscriptions.append((pattern, client))
+
+    def _route(self, topic, payload, qos):
+        message = _Message(topic, payload, qos)
+        with self._lock:
+            self.messages.append((topic, payload))
+            subscribers = [
+                client
+                for pattern, client in self._subscriptions
+                if topic_matches(pattern, topic)
+            ]
+        for client in subscribers:
+            client._deliver(message)
+
+    def counts(self):
+        with self._lock:
+            return dict(Counter(topic for topic, _ in self.messages))
+
+
+# Klien dengan API yang dipakai skrip dari paho.mqtt.client.Client
+class InProcessMqttClient:
+    def __init__(self, broker):
+        self.broker = broker
+        self.on_connect = None
+        self.on_publish = None
+        self.on_message = None
+        self._callbacks = {}
+        self._mids = itertools.count(1)
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def connect(self, host="localhost", port=1883, keepalive=60):
+        if self.on_connect is not None:
+            self.on_connect(self, None, {}, 0)
+        return 0
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def subscribe(self, topic, qos=0):
+        self.broker._subscribe(topic, self)
+        return 0, next(self._mids)
+
+    def message_callback_add(self, pattern, callback):
+        self._callbacks[pattern] = callback
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        mid = next(self._mids)
+        if isinstance(payload, str):
+            payload = payload.encode()
+        self.broker._route(topic, payload, qos)
+        if self.on_publish is not None:
+            if self.broker.ack_delay:
+                threading.Timer(
+                    self.broker.ack_delay, self.on_publish, (self, None, mid)
+                ).start()
+            else:
+                self.on_publish(self, None, mid)
+        return _MessageInfo(mid)
+
+    def _deliver(self, message):
+        for pattern, callback in self._callbacks.items():
+            if topic_matches(pattern, message.topic):
+                callback(self, None, message)
+                return
+        if self.on_message is not None:
+            self.on_message(self, None, message)
+
+
+def create_app(db_uri):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def open_grabber(source, name, args):
+    cap = ReplayCapture(source, fps=args.fps, realtime=args.speed == "realtime")
+    if not cap.isOpened():
+        raise SystemExit(f"Gagal membuka rekaman {source}")
+    grabber_class = FrameGrabber if args.speed == "realtime" else ReplayGrabber
+    return grabber_class(cap, name=name).start()
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Putar ulang rekaman gerbang lewat pipeline dan ukur kinerjanya."
+    )
+    parser.add_argument(
+        "--pipeline", choices=["main", "interval2", "inoutocr"], default="main"
+    )
+    parser.add_argument("--source", required=True, help="File video/folder gambar")
+    parser.add_argument("--exit-source", help="Rekaman kamera keluar (inoutocr)")
+    parser.add_argument("--speed", choices=["realtime", "max"], default="max")
+    parser.add_argument("--fps", type=float, help="Fps rekaman (default dari file)")
+    parser.add_argument("--model", default="best.pt")
+    parser.add_argument("--roi", help="Kunci roi_config.json untuk kamera (masuk)")
+    parser.add_argument("--exit-roi", help="Kunci roi_config.json kamera keluar")
+    parser.add_argument("--db-uri", help="Default: SQLite di folder sementara")
+    parser.add_argument("--mqtt-ack-delay", type=float, default=0.005)
+    parser.add_argument("--ocr-workers", type=int, default=2)
+    parser.add_argument("--output", help="Simpan hasil JSON ke file ini")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="replay-")
+    app = create_app(args.db_uri or f"sqlite:///{workdir}/replay.db")
+    model = model_registry.get(args.model)
+    broker = InProcessBroker(ack_delay=args.mqtt_ack_delay)
+    frame_store = LocalFrameStore(os.path.join(workdir, "frames"))
+    writer = DetectionWriter(app, db, Detection)
+    roi = get_roi(args.roi) if args.roi else None
+    grabbers = [open_grabber(args.source, "replay masuk", args)]
+    components = {}
+
+    with app.app_context():
+        db.create_all()
+
+        # Susun pipeline yang sama dengan skripnya, dengan pengganti lokal
+        # untuk kamera, PostgreSQL, dan broker MQTT
+        if args.pipeline == "main":
+            import main as script
+
+            writer.add_listener(OccupancyAggregator())
+            client = broker.client()
+            client.connect()
+            gate_commands = GateCommandDispatcher(
+                client, script.mqtt_topic, debounce=script.gate_debounce, qos=1
+            ).start()
+            components["mqtt"] = gate_commands
+            engine = script.build_pipeline(
+                model,
+                grabbers[0],
+                writer,
+                frame_store,
+                gate_commands,
+                roi=roi,
+                display=False,
+            )
+        elif args.pipeline == "interval2":
+            import interval2 as script
+
+            writer.add_listener(OccupancyAggregator())
+            engine = script.build_pipeline(
+                model, grabbers[0], writer, frame_store, roi=roi, display=False
+            )
+        else:
+            import inoutocr as script
+            from ocr_pool import OcrWorkerPool
+            from parking_sessions import ParkingSessionStore
+
+            writer.add_listener(OccupancyAggregator())
+            grabbers.append(
+                open_grabber(args.exit_source or args.source, "replay keluar", args)
+            )
+            ocr_pool = OcrWorkerPool(["en", "id"], workers=args.ocr_workers)
+            components["ocr"] = ocr_pool
+            sessions = ParkingSessionStore(fuzzy=True).load()
+            engine = script.build_pipeline(
+                model,
+                grabbers[0],
+                grabbers[1],
+                writer,
+                frame_store,
+                sessions,
+                ocr_pool,
+                roi_in=roi,
+                roi_out=get_roi(args.exit_roi) if args.exit_roi else None,
+            )
+
+        writer.start()
+        started = time.perf_counter()
+        engine.run()  # Berhenti saat semua rekaman habis
+        wall_time = time.perf_counter() - started
+
+        writer.stop()
+        for grabber in grabbers:
+            grabber.stop()
+        if "mqtt" in components:
+            components["mqtt"].stop()
+        if "ocr" in components:
+            components["ocr"].shutdown(wait=True)  # Agar RSS worker tercatat
+
+        detections = dict(
+            db.session.query(Detection.detected_objects, func.count(Detection.id))
+            .group_by(Detection.detected_objects)
+            .all()
+        )
+
+    engine_stats = engine.stats()
+    latency = {
+        "decode": {g.name: g.decode_latency.snapshot() for g in grabbers},
+        "decision": {g.name: g.latency.snapshot() for g in grabbers},
+        "inference": engine_stats["inference_latency"],
+        "handler": engine_stats["handler_latency"],
+        "encode": frame_store.encode_latency.snapshot(),
+        "image_write": frame_store.write_latency.snapshot(),
+        "db_flush": writer.flush_latency.snapshot(),
+    }
+    if "ocr" in components:
+        latency["ocr"] = components["ocr"].latency["total"].snapshot()
+    if "mqtt" in components:
+        latency["mqtt_ack"] = components["mqtt"].ack_latency.snapshot()
+
+    results = {
+        "pipeline": args.pipeline,
+        "source": args.source,
+        "speed": args.speed,
+        "backend": model.backend,
+        "wall_time_s": round(wall_time, 2),
+        "fps": round(engine.frames_processed / wall_time, 2) if wall_time else 0.0,
+        "frames": {
+            "read": sum(g.cap.frames_read for g in grabbers),
+            "dropped": sum(g.frames_dropped for g in grabbers),
+            "processed": engine.frames_processed,
+            "inferred": engine.frames_inferred,
+        },
+        "latency": latency,
+        "memory": {
+            "peak_rss_mb": peak_rss_mb(),
+            "ocr_workers_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        },
+        "counts": {
+            "detections": detections,
+            "mqtt_messages": broker.counts(),
+        },
+        "components": {
+            "engine": engine_stats,
+            "writer": writer.stats(),
+            **{name: component.stats() for name, component in components.items()},
+        },
+    }
+
+    output = json.dumps(results, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
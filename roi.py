@@ -0,0 +1,71 @@
+import json
+import logging
+import os
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger()
+
+# File konfigurasi ROI: {"<sumber kamera>": [[x, y], [x, y], ...], ...}
+ROI_CONFIG_PATH = os.getenv("ROI_CONFIG", "roi_config.json")
+
+
+# Memotong area jalur gerbang (bounding box poligon ROI) pada resolusi asli
+# sebelum inferensi, lalu memetakan koordinat box kembali ke frame asli.
+class RoiCropper:
+    def __init__(self, polygon, mask_outside=False):
+        self.polygon = np.asarray(polygon, dtype=np.int32)
+        self.mask_outside = mask_outside  # Hitamkan piksel di luar poligon
+        self.x, self.y, self.width, self.height = cv2.boundingRect(self.polygon)
+
+    def crop(self, frame):
+        frame_height, frame_width = frame.shape[:2]
+        x0, y0 = max(0, self.x), max(0, self.y)
+        x1 = min(frame_width, self.x + self.width)
+        y1 = min(frame_height, self.y + self.height)
+        cropped = frame[y0:y1, x0:x1]
+
+        if self.mask_outside:
+            mask = np.zeros(cropped.shape[:2], dtype=np.uint8)
+            cv2.fillPoly(mask, [self.polygon - [x0, y0]], 255)
+            cropped = cv2.bitwise_and(cropped, cropped, mask=mask)
+        return cropped
+
+    @property
+    def offset(self):
+        return max(0, self.x), max(0, self.y)
+
+    # Geser box xyxy (array N x 4) dari koordinat crop ke koordinat frame asli
+    def map_boxes(self, xyxy):
+        x0, y0 = self.offset
+        return np.asarray(xyxy) + np.array([x0, y0, x0, y0], dtype=np.float32)
+
+    # Ubah hasil YOLO dari crop agar mengacu ke frame asli (box, orig_img),
+    # sehingga boxes.xyxy dan plot() tetap bisa dipakai seperti biasa
+    def map_result(self, result, frame):
+        x0, y0 = self.offset
+        data = result.boxes.data.clone()
+        data[:, [0, 2]] += x0
+        data[:, [1, 3]] += y0
+        result.orig_img = frame
+        result.orig_shape = frame.shape[:2]
+        result.update(boxes=data)
+        return result
+
+
+# Muat ROI per kamera dari file konfigurasi. Kamera tanpa ROI memakai frame
+# penuh.
+def load_rois(path=ROI_CONFIG_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        config = json.load(f)
+    rois = {str(source): RoiCropper(polygon) for source, polygon in config.items()}
+    logger.info(f"ROI dimuat untuk {len(rois)} kamera dari {path}.")
+    return rois
+
+
+# ROI untuk satu sumber kamera, atau None jika tidak dikonfigurasi
+def get_roi(source, path=ROI_CONFIG_PATH):
+    return load_rois(path).get(str(source))
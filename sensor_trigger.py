@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger()
+
+
+# Gate berbasis sensor untuk mode event-driven. Pesan MQTT dari loop detector
+# atau sensor ultrasonik (mis. topik parking/sensor) membuka "burst" selama
+# burst_duration detik: semua frame baru dijalankan ke YOLO (dibatasi
+# burst_fps). Di luar burst YOLO hanya jalan sekali setiap idle_interval
+# detik, sehingga satu perangkat bisa melayani lebih banyak jalur.
+class SensorTrigger:
+    def __init__(
+        self,
+        topic="parking/sensor",
+        burst_duration=3.0,
+        burst_fps=None,
+        idle_interval=2.0,
+        qos=1,
+    ):
+        self.topic = topic
+        self.burst_duration = burst_duration
+        self.burst_fps = burst_fps  # None = setiap frame baru selama burst
+        self.idle_interval = idle_interval  # None = tidak ada inferensi saat idle
+        self.qos = qos
+
+        self._lock = threading.Lock()
+        self._burst_until = 0.0
+        self._last_infer = 0.0
+
+        # Statistik
+        self.triggers = 0
+        self.burst_frames = 0
+        self.idle_frames = 0
+        self.frames_skipped = 0
+
+    # Pasang callback pesan sensor. Panggil subscribe() dari on_connect agar
+    # langganan dipulihkan setelah koneksi ulang.
+    def attach(self, client):
+        client.message_callback_add(self.topic, self._on_message)
+        return self
+
+    def subscribe(self, client):
+        client.subscribe(self.topic, qos=self.qos)
+        logger.info(f"Menunggu sinyal sensor di topik {self.topic}.")
+
+    def _on_message(self, client, userdata, message):
+        self.trigger()
+
+    # Mulai (atau perpanjang) burst inferensi
+    def trigger(self, duration=None):
+        with self._lock:
+            until = time.monotonic() + (duration or self.burst_duration)
+            self._burst_until = max(self._burst_until, until)
+            self.triggers += 1
+
+    def in_burst(self):
+        return time.monotonic() < self._burst_until
+
+    def should_infer(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._burst_until:
+                if self.burst_fps and now - self._last_infer < 1.0 / self.burst_fps:
+                    self.frames_skipped += 1
+                    return False
+                self._last_infer = now
+                self.burst_frames += 1
+                return True
+
+            if (
+                self.idle_interval is not None
+                and now - self._last_infer >= self.idle_interval
+            ):
+                self._last_infer = now
+                self.idle_frames += 1
+                return True
+
+            self.frames_skipped += 1
+            return False
+
+    # Dapat dipakai langsung sebagai gate di BatchInferenceEngine
+    def __call__(self, captured):
+        return self.should_infer()
+
+    def stats(self):
+        return {
+            "triggers": self.triggers,
+            "in_burst": self.in_burst(),
+            "burst_frames": self.burst_frames,
+            "idle_frames": self.idle_frames,
+            "frames_skipped": self.frames_skipped,
+        }
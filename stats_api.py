@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from aggregates import GRANULARITIES, current_occupancy, throughput
+
+stats_api = Blueprint("stats_api", __name__)
+
+
+# GET /stats/occupancy
+# Jumlah kendaraan yang sedang parkir, dari tabel rekap (bukan tabel detection)
+@stats_api.route("/stats/occupancy", methods=["GET"])
+def get_occupancy():
+    return jsonify(
+        {"occupancy": current_occupancy(), "updated_at": datetime.utcnow().isoformat()}
+    )
+
+
+# GET /stats/throughput?granularity=minute|hour&start=&end=
+# Jumlah masuk, keluar, dan per kelas untuk setiap menit/jam
+@stats_api.route("/stats/throughput", methods=["GET"])
+def get_throughput():
+    granularity = request.args.get("granularity", "hour")
+    try:
+        start = request.args.get("start", type=datetime.fromisoformat)
+        end = request.args.get("end", type=datetime.fromisoformat)
+    except ValueError:
+        return jsonify({"error": "Parameter tidak valid"}), 400
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": "granularity harus minute atau hour"}), 400
+
+    return jsonify(
+        {"granularity": granularity, "buckets": throughput(granularity, start, end)}
+    )
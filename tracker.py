@@ -0,0 +1,114 @@
+import itertools
+import time
+
+import numpy as np
+
+
+# IoU antara setiap pasangan box a (N x 4) dan b (M x 4), hasil N x M
+def iou_matrix(a, b):
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+# Satu kendaraan yang diikuti dari frame ke frame
+class Track:
+    def __init__(self, track_id, box, cls):
+        self.id = track_id
+        self.box = box
+        self.cls = cls
+        self.hits = 1
+        self.missed = 0
+        self.first_seen = time.time()
+        self.last_seen = self.first_seen
+        self._events = set()
+
+    # Apakah event (mis. "gate", "db", "ocr") sudah dijalankan untuk track ini
+    def done(self, event):
+        return event in self._events
+
+    def mark(self, event):
+        self._events.add(event)
+
+    def clear(self, event):
+        self._events.discard(event)
+
+    # True hanya pada pemanggilan pertama untuk event tersebut
+    def once(self, event):
+        if event in self._events:
+            return False
+        self._events.add(event)
+        return True
+
+
+# Tracker IoU sederhana: box baru dicocokkan secara greedy ke track yang ada
+# berdasarkan IoU tertinggi. Track yang tidak terlihat lebih dari max_missed
+# inferensi berturut-turut dihapus.
+class IouTracker:
+    def __init__(self, iou_threshold=0.3, max_missed=10, min_hits=2):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.min_hits = min_hits  # Jumlah deteksi sebelum track dianggap valid
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    # Perbarui tracker dengan box (N x 4) dan kelas (N) dari satu frame.
+    # Mengembalikan track valid yang terlihat di frame ini.
+    def update(self, xyxy, classes):
+        xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        classes = np.asarray(classes).astype(int).reshape(-1)
+        now = time.time()
+
+        matched_tracks = set()
+        matched_boxes = set()
+        if self.tracks and len(xyxy):
+            ious = iou_matrix([track.box for track in self.tracks], xyxy)
+            for flat_index in np.argsort(-ious, axis=None):
+                track_index, box_index = np.unravel_index(flat_index, ious.shape)
+                if ious[track_index, box_index] < self.iou_threshold:
+                    break
+                if track_index in matched_tracks or box_index in matched_boxes:
+                    continue
+                track = self.tracks[track_index]
+                track.box = xyxy[box_index]
+                track.cls = int(classes[box_index])
+                track.hits += 1
+                track.missed = 0
+                track.last_seen = now
+                matched_tracks.add(track_index)
+                matched_boxes.add(box_index)
+
+        for track_index, track in enumerate(self.tracks):
+            if track_index not in matched_tracks:
+                track.missed += 1
+
+        visible = [self.tracks[index] for index in matched_tracks]
+        for box_index in range(len(xyxy)):
+            if box_index not in matched_boxes:
+                track = Track(
+                    next(self._ids), xyxy[box_index], int(classes[box_index])
+                )
+                self.tracks.append(track)
+                visible.append(track)
+
+        self.tracks = [
+            track for track in self.tracks if track.missed <= self.max_missed
+        ]
+        return [track for track in visible if track.hits >= self.min_hits]
+
+    # Perbarui tracker langsung dari hasil YOLO (results[0])
+    def update_from_result(self, result):
+        boxes = result.boxes
+        return self.update(boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy())
+
+    # Perbarui tracker dari postprocess.Detections (sudah berupa array NumPy)
+    def update_from_detections(self, detections):
+        return self.update(detections.xyxy, detections.cls)